@@ -31,9 +31,22 @@ def create_app(config_name=None):
     # Configure connection pool for Cloud Run (serverless) - optimized for transaction pooler
     # Transaction pooler handles connection pooling at the database level, so we use smaller pools
     # Supabase transaction pooler requires SSL connections
+    # Peak sessions per gunicorn worker: every request thread, WEBHOOK_WORKERS background
+    # jobs each running WEBHOOK_ORDER_WORKERS order threads, and the order threads of one
+    # bulk retry (the job/request that starts the threads releases its own connection).
+    # Overflow covers that peak so none of them queue for a connection (the transaction
+    # pooler multiplexes them at the DB). Further concurrent bulk retries can still wait
+    # up to pool_timeout; DB_MAX_OVERFLOW overrides the derived value.
+    pool_size = 2
+    order_workers = int(os.environ.get('WEBHOOK_ORDER_WORKERS', '3'))
+    peak_sessions = (
+        int(os.environ.get('GUNICORN_THREADS', '4'))
+        + int(os.environ.get('WEBHOOK_WORKERS', '2')) * order_workers
+        + order_workers
+    )
     app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_size': 2,  # Small pool for transaction pooler (connections are pooled at DB level)
-        'max_overflow': 5,  # Minimal overflow since transaction pooler handles pooling
+        'pool_size': pool_size,  # Small pool for transaction pooler (connections are pooled at DB level)
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', max(peak_sessions - pool_size, 0))),
         'pool_pre_ping': True,  # Verify connections before using them
         'pool_recycle': 1800,  # Recycle connections after 30 minutes (shorter for serverless)
         'connect_args': {
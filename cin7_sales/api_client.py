@@ -3,10 +3,30 @@ Cin7/Dear Systems API Client for Sales Orders
 """
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urlencode
 from typing import Dict, Any, Tuple, Optional, List, Callable
 from datetime import datetime
 
+from cin7_sales.rate_limiter import CIN7_REQUEST_INTERVAL, cin7_account_limiter
+
+
+# Connection pool shared by every client instance so keep-alive connections to
+# Cin7 survive across uploads and retries. Only idempotent GETs are retried -
+# retrying a POST could create a duplicate Sale.
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False
+    )
+)
+
 
 class Cin7SalesAPI:
     """Client for Dear Systems/Cin7 Sales API"""
@@ -30,22 +50,21 @@ class Cin7SalesAPI:
         self.base_url = base_url.rstrip('/')
         self.logger_callback = logger_callback
         self.session = requests.Session()
+        self.session.mount('https://', _HTTP_ADAPTER)
+        self.session.mount('http://', _HTTP_ADAPTER)
         self.session.headers.update({
             "Content-Type": "application/json",
             "Accept": "application/json",
             "api-auth-accountid": account_id,
             "api-auth-applicationkey": application_key
         })
-        self.last_request_time = 0
-        self.min_request_interval = 0.34  # ~3 requests per second (slightly conservative)
+        self.min_request_interval = CIN7_REQUEST_INTERVAL  # ~3 requests per second (slightly conservative)
+        # Shared with every other client for this account in the process
+        self._rate_limiter = cin7_account_limiter(account_id)
     
     def _rate_limit(self):
-        """Enforce rate limiting (3 req/sec, 60 req/min)"""
-        now = time.time()
-        elapsed = now - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
+        """Enforce rate limiting (3 req/sec, 60 req/min), shared by every client and thread for this account"""
+        self._rate_limiter.acquire()
     
     def _build_query_string(self, params: Dict[str, Any]) -> str:
         """Build query string from parameters"""
@@ -7,6 +7,43 @@ from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import re
 
+# Common CSV header aliases for each Cin7 field (case-insensitive matching)
+FIELD_ALIASES = {
+    'CustomerID': ['customer_id', 'customerid', 'customer', 'customer id', 'cust_id'],
+    'CustomerName': ['customer_name', 'customername', 'customer name', 'name', 'customer'],
+    'CustomerEmail': ['customer_email', 'customeremail', 'customer email', 'email'],
+    'SaleOrderNumber': ['sale_order_number', 'saleordernumber', 'sale order number', 'order_number', 'order number', 'order', 'order_id', 'orderid'],
+    'InvoiceNumber': ['invoice_number', 'invoicenumber', 'invoice number', 'invoice #', 'invoice#', 'invoice', 'invoice_id', 'invoiceid'],
+    'CustomerReference': ['customer_reference', 'customerreference', 'customer reference', 'reference', 'ref', 'po_number', 'po number', 'po'],
+    'SaleOrderDate': ['sale_order_date', 'saleorderdate', 'sale order date', 'sale_date', 'saledate', 'sale date', 'date', 'order_date', 'order date'],
+    'Status': ['status', 'order_status', 'order status'],
+    'Location': ['location', 'warehouse', 'location_id', 'locationid'],
+    'Currency': ['currency', 'currency_code', 'currencycode'],
+    'TaxInclusive': ['tax_inclusive', 'taxinclusive', 'tax inclusive', 'tax_inc'],
+    'Lines': ['lines', 'items', 'products', 'line_items'],
+    'SKU': ['sku', 'product_sku', 'productsku', 'product sku', 'item_sku', 'itemsku'],
+    'ProductName': ['product_name', 'productname', 'product name', 'name', 'item_name', 'itemname'],
+    'Quantity': ['quantity', 'qty', 'qty_ordered', 'qtyordered'],
+    'Price': ['price', 'unit_price', 'unitprice', 'unit price', 'price_per_unit'],
+    'Discount': ['discount', 'discount_amount', 'discountamount', 'discount_percent', 'discountpercent'],
+    'Tax': ['tax', 'tax_amount', 'taxamount', 'tax_rate', 'taxrate']
+}
+
+
+def _normalize_header(name: str) -> str:
+    """Normalize a column name for comparison (remove special chars, normalize spaces)"""
+    return name.lower().replace('_', ' ').replace('-', ' ').replace('#', '').strip()
+
+
+# Lower-cased and normalized alias -> Cin7 fields it maps to, built once at import
+_ALIAS_INDEX: Dict[str, List[str]] = {}
+for _field, _aliases in FIELD_ALIASES.items():
+    for _alias in _aliases:
+        for _key in (_alias.lower(), _normalize_header(_alias)):
+            _fields = _ALIAS_INDEX.setdefault(_key, [])
+            if _field not in _fields:
+                _fields.append(_field)
+
 
 class CSVParser:
     """Parser for CSV files containing sales order data"""
@@ -20,7 +57,27 @@ class CSVParser:
         """
         self.date_format = date_format
     
-    def _is_row_complete(self, row_data: Dict[str, Any]) -> bool:
+    # Column-name fragments that mark a column as identifying a real order line
+    KEY_FIELD_PATTERNS = (
+        'customer', 'customer name', 'customername',
+        'item', 'item code', 'itemcode', 'sku',
+        'order', 'order #', 'order#',
+        'date', 'po', 'po #', 'po#'
+    )
+    
+    def _key_columns(self, columns) -> List[str]:
+        """
+        Return the columns whose name matches one of KEY_FIELD_PATTERNS.
+        
+        Depends only on the header, so parse_file computes it once per file
+        instead of re-matching every pattern against every row.
+        """
+        return [
+            col for col in columns
+            if col and any(pattern in col.lower() for pattern in self.KEY_FIELD_PATTERNS)
+        ]
+    
+    def _is_row_complete(self, row_data: Dict[str, Any], key_columns: Optional[List[str]] = None) -> bool:
         """
         Check if a row is complete (not a summary/total row).
         
@@ -29,6 +86,7 @@ class CSVParser:
         
         Args:
             row_data: Dictionary of row data
+            key_columns: Precomputed result of _key_columns for this row's header
         
         Returns:
             True if row appears complete, False if it's likely a summary/total row
@@ -36,55 +94,21 @@ class CSVParser:
         # Count non-empty values
         non_empty_count = sum(1 for v in row_data.values() if v and str(v).strip())
         
-        # If row has very few non-empty values (less than 3), it's likely incomplete
+        # If row has very few non-empty values (less than 3), it's likely incomplete.
+        # This also covers rows that only carry total fields (e.g. "Extended Price").
         if non_empty_count < 3:
             return False
         
-        # Check for key fields that indicate a valid data row
-        # Common field names that should be present in a valid row
-        key_field_patterns = [
-            'customer', 'customer name', 'customername',
-            'item', 'item code', 'itemcode', 'sku',
-            'order', 'order #', 'order#',
-            'date', 'po', 'po #', 'po#'
-        ]
-        
-        row_keys_lower = [k.lower().strip() for k in row_data.keys()]
-        row_values_lower = [str(v).lower().strip() for v in row_data.values() if v]
-        
-        # Check if any key field has a value
-        has_key_field = False
-        for pattern in key_field_patterns:
-            # Check if pattern matches any column name
-            if any(pattern in key for key in row_keys_lower):
-                # Check if that column has a value
-                for key, value in row_data.items():
-                    if pattern in key.lower() and value and str(value).strip():
-                        has_key_field = True
-                        break
-                if has_key_field:
-                    break
+        if key_columns is None:
+            key_columns = self._key_columns(row_data.keys())
         
         # If no key fields have values, it's likely a summary row
-        if not has_key_field:
-            return False
-        
-        # Additional check: if row only has numeric/total fields (like "Extended Price"), it's likely a total row
-        total_field_patterns = ['total', 'sum', 'extended price', 'extendedprice', 'amount', 'subtotal']
-        has_only_totals = True
-        for key, value in row_data.items():
+        for col in key_columns:
+            value = row_data.get(col)
             if value and str(value).strip():
-                key_lower = key.lower()
-                # If this field is not a total field and has a value, row might be valid
-                if not any(pattern in key_lower for pattern in total_field_patterns):
-                    has_only_totals = False
-                    break
-        
-        # If row only contains total fields, it's incomplete
-        if has_only_totals and non_empty_count <= 2:
-            return False
+                return True
         
-        return True
+        return False
     
     def parse_file(self, file_content: bytes, filename: str = '') -> Tuple[List[Dict[str, Any]], List[str], List[int]]:
         """
@@ -97,55 +121,126 @@ class CSVParser:
         Returns:
             (rows, errors, skipped_rows) - List of row dictionaries, list of error messages, and list of skipped row numbers
         """
+        # Decode while reading instead of materializing the whole file as one str
+        # (plus the StringIO copy of it). UTF-8 is tried first; latin-1 accepts any
+        # byte sequence, so the second pass cannot fail to decode.
+        for encoding in ('utf-8', 'latin-1'):
+            try:
+                return self._parse_stream(
+                    io.TextIOWrapper(io.BytesIO(file_content), encoding=encoding, newline='')
+                )
+            except UnicodeDecodeError:
+                continue
+        
+        return [], [f"Could not decode file {filename}. Please ensure it's UTF-8 or Latin-1 encoded."], []
+    
+    def find_rows(self, file_content: bytes, row_numbers, filename: str = '') -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Return only the rows with the given row numbers.
+        
+        Reading stops as soon as the last wanted row has been seen, so picking a
+        few rows out of a large file doesn't parse (or hold) the rest of it.
+        Row numbers are the same as parse_file's.
+        
+        Args:
+            file_content: CSV file content as bytes
+            row_numbers: Row numbers to return
+            filename: Optional filename for error messages
+        
+        Returns:
+            (rows, errors) - Matching row dictionaries in file order, and list of error messages
+        """
+        for encoding in ('utf-8', 'latin-1'):
+            needed = set(row_numbers)
+            rows = []
+            if not needed:
+                return rows, []
+            try:
+                stream = io.TextIOWrapper(io.BytesIO(file_content), encoding=encoding, newline='')
+                for row in self._iter_stream(stream, []):
+                    if row['row_number'] in needed:
+                        rows.append(row)
+                        needed.discard(row['row_number'])
+                        if not needed:
+                            break
+                return rows, []
+            except UnicodeDecodeError:
+                continue
+            except Exception as e:
+                return rows, [f"Error parsing CSV: {str(e)}"]
+        
+        return [], [f"Could not decode file {filename}. Please ensure it's UTF-8 or Latin-1 encoded."]
+    
+    def _parse_stream(self, stream: io.TextIOBase) -> Tuple[List[Dict[str, Any]], List[str], List[int]]:
+        """
+        Parse CSV rows from a text stream (see parse_file).
+        
+        Raises:
+            UnicodeDecodeError: If the stream's encoding doesn't match the content
+        """
         errors = []
         rows = []
         skipped_rows = []
         
         try:
-            # Try to detect encoding
-            content_str = file_content.decode('utf-8')
+            # extend() keeps the rows read before a parse error, as before
+            rows.extend(self._iter_stream(stream, skipped_rows))
         except UnicodeDecodeError:
-            try:
-                content_str = file_content.decode('latin-1')
-            except UnicodeDecodeError:
-                errors.append(f"Could not decode file {filename}. Please ensure it's UTF-8 or Latin-1 encoded.")
-                return rows, errors
+            raise
+        except Exception as e:
+            errors.append(f"Error parsing CSV: {str(e)}")
         
+        return rows, errors, skipped_rows
+    
+    def _iter_stream(self, stream: io.TextIOBase, skipped_rows: List[int]):
+        """
+        Yield complete rows ({'row_number', 'data'}) from a text stream.
+        
+        Row numbers of incomplete (summary/total) rows are appended to skipped_rows.
+        Decoding and CSV errors propagate to the caller.
+        """
         # Parse CSV
         try:
             # Try to detect delimiter
             sniffer = csv.Sniffer()
-            sample = content_str[:1024]
+            sample = stream.read(1024)
+            stream.seek(0)
             delimiter = sniffer.sniff(sample).delimiter
+        except UnicodeDecodeError:
+            raise
         except:
+            stream.seek(0)
             delimiter = ','
         
-        try:
-            reader = csv.DictReader(io.StringIO(content_str), delimiter=delimiter)
-            for row_num, row in enumerate(reader, start=2):  # Start at 2 (row 1 is header)
-                # Clean up row (remove None values, strip strings)
-                cleaned_row = {}
-                for key, value in row.items():
-                    if key:
-                        cleaned_key = key.strip()
-                        if value:
-                            cleaned_row[cleaned_key] = value.strip()
-                        else:
-                            cleaned_row[cleaned_key] = ''
-                
-                if cleaned_row:  # Only process non-empty rows
-                    # Check if row is complete (not a summary/total row)
-                    if self._is_row_complete(cleaned_row):
-                        rows.append({
-                            'row_number': row_num,
-                            'data': cleaned_row
-                        })
-                    else:
-                        skipped_rows.append(row_num)
-        except Exception as e:
-            errors.append(f"Error parsing CSV: {str(e)}")
-        
-        return rows, errors, skipped_rows
+        # Plain csv.reader + one zip against the cleaned header is cheaper than
+        # DictReader building a dict per row that is then rebuilt anyway
+        reader = csv.reader(stream, delimiter=delimiter)
+        header = next(reader, None) or []
+        # (position, cleaned name) for every named column
+        columns = [(index, key.strip()) for index, key in enumerate(header) if key]
+        key_columns = self._key_columns(name for _, name in columns)
+        row_num = 1  # Row 1 is the header; blank lines are not counted
+        for values in reader:
+            if not values:
+                continue
+            row_num += 1
+            
+            # Clean up row (missing trailing cells become '', strip strings)
+            width = len(values)
+            cleaned_row = {}
+            for index, key in columns:
+                value = values[index] if index < width else None
+                cleaned_row[key] = value.strip() if value else ''
+            
+            if cleaned_row:  # Only process non-empty rows
+                # Check if row is complete (not a summary/total row)
+                if self._is_row_complete(cleaned_row, key_columns):
+                    yield {
+                        'row_number': row_num,
+                        'data': cleaned_row
+                    }
+                else:
+                    skipped_rows.append(row_num)
     
     def detect_columns(self, rows: List[Dict[str, Any]]) -> Dict[str, List[str]]:
         """
@@ -160,53 +255,24 @@ class CSVParser:
         if not rows:
             return {}
         
-        # Get all unique column names from the CSV
-        all_columns = set()
-        for row in rows:
-            all_columns.update(row['data'].keys())
-        
-        all_columns = list(all_columns)
-        
-        # Common field mappings (case-insensitive matching)
-        field_mappings = {
-            'CustomerID': ['customer_id', 'customerid', 'customer', 'customer id', 'cust_id'],
-            'CustomerName': ['customer_name', 'customername', 'customer name', 'name', 'customer'],
-            'CustomerEmail': ['customer_email', 'customeremail', 'customer email', 'email'],
-            'SaleOrderNumber': ['sale_order_number', 'saleordernumber', 'sale order number', 'order_number', 'order number', 'order', 'order_id', 'orderid'],
-            'InvoiceNumber': ['invoice_number', 'invoicenumber', 'invoice number', 'invoice #', 'invoice#', 'invoice', 'invoice_id', 'invoiceid'],
-            'CustomerReference': ['customer_reference', 'customerreference', 'customer reference', 'reference', 'ref', 'po_number', 'po number', 'po'],
-            'SaleOrderDate': ['sale_order_date', 'saleorderdate', 'sale order date', 'sale_date', 'saledate', 'sale date', 'date', 'order_date', 'order date'],
-            'Status': ['status', 'order_status', 'order status'],
-            'Location': ['location', 'warehouse', 'location_id', 'locationid'],
-            'Currency': ['currency', 'currency_code', 'currencycode'],
-            'TaxInclusive': ['tax_inclusive', 'taxinclusive', 'tax inclusive', 'tax_inc'],
-            'Lines': ['lines', 'items', 'products', 'line_items'],
-            'SKU': ['sku', 'product_sku', 'productsku', 'product sku', 'item_sku', 'itemsku'],
-            'ProductName': ['product_name', 'productname', 'product name', 'name', 'item_name', 'itemname'],
-            'Quantity': ['quantity', 'qty', 'qty_ordered', 'qtyordered'],
-            'Price': ['price', 'unit_price', 'unitprice', 'unit price', 'price_per_unit'],
-            'Discount': ['discount', 'discount_amount', 'discountamount', 'discount_percent', 'discountpercent'],
-            'Tax': ['tax', 'tax_amount', 'taxamount', 'tax_rate', 'taxrate']
+        # Every parsed row carries the same (header) keys, so the first row is enough
+        all_columns = list(rows[0]['data'].keys())
+        
+        # Look each column up in the alias index instead of comparing it to every alias
+        matched_columns: Dict[str, List[str]] = {}
+        for col in all_columns:
+            col_lower = col.lower().strip()
+            fields = _ALIAS_INDEX.get(col_lower, []) + _ALIAS_INDEX.get(_normalize_header(col_lower), [])
+            for cin7_field in dict.fromkeys(fields):
+                matched_columns.setdefault(cin7_field, []).append(col)
+        
+        # Keep FIELD_ALIASES order so callers see fields in a stable order
+        detected_mappings = {
+            cin7_field: matched_columns[cin7_field]
+            for cin7_field in FIELD_ALIASES
+            if cin7_field in matched_columns
         }
         
-        detected_mappings = {}
-        
-        # For each Cin7 field, find matching CSV columns
-        for cin7_field, possible_names in field_mappings.items():
-            matches = []
-            for col in all_columns:
-                col_lower = col.lower().strip()
-                # Normalize column name for comparison (remove special chars, normalize spaces)
-                col_normalized = col_lower.replace('_', ' ').replace('-', ' ').replace('#', '').strip()
-                for possible_name in possible_names:
-                    possible_normalized = possible_name.lower().replace('_', ' ').replace('-', ' ').replace('#', '').strip()
-                    if col_lower == possible_name.lower() or col_normalized == possible_normalized:
-                        matches.append(col)
-                        break
-            
-            if matches:
-                detected_mappings[cin7_field] = matches
-        
         return detected_mappings
     
     def transform_value(self, value: str, field_type: str, date_format: Optional[str] = None) -> Any:
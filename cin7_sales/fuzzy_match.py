@@ -3,6 +3,7 @@ Fuzzy matching utilities for customers and addresses
 """
 from typing import List, Dict, Any, Tuple, Optional
 from difflib import SequenceMatcher
+from functools import lru_cache
 
 
 def string_similarity(s1: str, s2: str) -> float:
@@ -31,6 +32,8 @@ def string_similarity(s1: str, s2: str) -> float:
     return SequenceMatcher(None, s1_normalized, s2_normalized).ratio()
 
 
+# The same candidate addresses are re-normalized for every order of a customer
+@lru_cache(maxsize=4096)
 def normalize_address(address_str: str) -> str:
     """
     Normalize an address string for comparison.
@@ -0,0 +1,80 @@
+"""
+Rate limiting for Cin7 API work
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class RateLimiter:
+    """
+    Spaces out work so it starts at most once per `interval` seconds.
+
+    Unlike a fixed sleep after each call, acquire() only blocks for whatever is
+    left of the interval - time already spent doing the work counts towards it.
+    Optionally also caps the number of starts in any `period` seconds at
+    `max_calls`. Safe to share between threads.
+    """
+
+    def __init__(self, interval: float, max_calls: Optional[int] = None, period: float = 60.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            interval: Minimum number of seconds between acquisitions
+            max_calls: Optional maximum number of acquisitions in any `period` seconds
+            period: Length in seconds of the max_calls window
+        """
+        self.interval = max(float(interval or 0), 0.0)
+        self.period = max(float(period or 0), 0.0)
+        self._next_allowed = 0.0
+        # Start times of the last max_calls acquisitions (in order - starts never go backwards)
+        self._starts = deque(maxlen=max_calls) if max_calls else None
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Block until the next slot is available.
+
+        Returns:
+            Number of seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next_allowed, now)
+            if self._starts is not None:
+                # Window full - wait until the oldest start in it drops out
+                if len(self._starts) == self._starts.maxlen:
+                    start = max(start, self._starts[0] + self.period)
+                self._starts.append(start)
+            self._next_allowed = start + self.interval
+
+        wait = start - now
+        if wait > 0:
+            time.sleep(wait)
+        return max(wait, 0.0)
+
+
+# Cin7 limits each account to 3 requests per second and 60 per minute
+CIN7_REQUEST_INTERVAL = 0.34  # slightly conservative
+CIN7_REQUESTS_PER_MINUTE = 60
+
+_account_limiters: Dict[str, RateLimiter] = {}
+_account_limiters_lock = threading.Lock()
+
+
+def cin7_account_limiter(account_id: str) -> RateLimiter:
+    """
+    Get the process-wide limiter for a Cin7 account.
+
+    Every API client for the same account shares it, so concurrent uploads,
+    order workers and retries together stay within the account's limits.
+    """
+    with _account_limiters_lock:
+        limiter = _account_limiters.get(account_id)
+        if limiter is None:
+            limiter = _account_limiters[account_id] = RateLimiter(
+                CIN7_REQUEST_INTERVAL, max_calls=CIN7_REQUESTS_PER_MINUTE, period=60.0
+            )
+        return limiter
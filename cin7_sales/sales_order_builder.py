@@ -442,6 +442,23 @@ class SalesOrderBuilder:
         
         return sale_order
     
+    def tax_rule_for(self, customer_data: Optional[Dict[str, Any]] = None, sale_data: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        TaxRule for order lines: from the customer, then the sale (once created), then settings.
+        
+        This is the only input to a Sale Order's lines that depends on sale_data, so
+        callers can compare results to tell whether a payload built before the Sale
+        existed is still valid.
+        """
+        # 1. Try from customer data (if available)
+        if customer_data and customer_data.get('TaxRule'):
+            return customer_data.get('TaxRule')
+        # 2. Try from sale data (if available - after sale is created)
+        if sale_data and sale_data.get('TaxRule'):
+            return sale_data.get('TaxRule')
+        # 3. Fallback to settings
+        return self.settings.get('tax_rule') or None
+    
     def _lookup_customer_by_name(self, customer_name: str, additional_attribute1: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Lookup customer by additional attribute first, then by name, and return customer data with shipping/billing IDs.
@@ -681,16 +698,7 @@ class SalesOrderBuilder:
                         line['Tax'] = 0.0
                         
                         # TaxRule - required, pull from customer, sale, or settings (in that order)
-                        tax_rule = None
-                        # 1. Try from customer data (if available)
-                        if self._current_customer_data and self._current_customer_data.get('TaxRule'):
-                            tax_rule = self._current_customer_data.get('TaxRule')
-                        # 2. Try from sale data (if available - after sale is created)
-                        elif self._current_sale_data and self._current_sale_data.get('TaxRule'):
-                            tax_rule = self._current_sale_data.get('TaxRule')
-                        # 3. Fallback to settings
-                        elif self.settings.get('tax_rule'):
-                            tax_rule = self.settings.get('tax_rule')
+                        tax_rule = self.tax_rule_for(self._current_customer_data, self._current_sale_data)
                         
                         if not tax_rule:
                             raise ValueError("TaxRule is required but not found in customer, sale, or client credentials settings. Please set 'tax_rule' in Cin7 credentials settings or ensure customer has TaxRule configured.")
@@ -818,16 +826,7 @@ class SalesOrderBuilder:
             line['Tax'] = 0.0
         
         # TaxRule (required - pull from customer, sale, or settings in that order)
-        tax_rule = None
-        # 1. Try from customer data (if available)
-        if self._current_customer_data and self._current_customer_data.get('TaxRule'):
-            tax_rule = self._current_customer_data.get('TaxRule')
-        # 2. Try from sale data (if available - after sale is created)
-        elif self._current_sale_data and self._current_sale_data.get('TaxRule'):
-            tax_rule = self._current_sale_data.get('TaxRule')
-        # 3. Fallback to settings
-        elif self.settings.get('tax_rule'):
-            tax_rule = self.settings.get('tax_rule')
+        tax_rule = self.tax_rule_for(self._current_customer_data, self._current_sale_data)
         
         if not tax_rule:
             raise ValueError("TaxRule is required but not found in customer, sale, or client credentials settings. Please set 'tax_rule' in Cin7 credentials settings or ensure customer has TaxRule configured.")
@@ -22,6 +22,7 @@ class SalesOrderValidator:
         self.product_cache = {}   # Cache validated products (by SKU)
         self.customer_lookup = {}  # Lookup by code/name: {code: customer_data, name: customer_data}
         self.product_lookup = {}    # Lookup by SKU: {sku: product_data}
+        self.customer_candidates = []  # Each preloaded customer with a Name once, for fuzzy name matching
         self.customers_loaded = False
         self.products_loaded = False
     
@@ -81,15 +82,8 @@ class SalesOrderValidator:
                 
                 # If not found by AdditionalAttribute1, get all customer candidates for fuzzy matching by name
                 if not customer:
-                    customer_candidates = []
-                    for key, cust in self.customer_lookup.items():
-                        # Skip attribute-based keys for name matching
-                        if key.startswith('_attr1:'):
-                            continue
-                        if isinstance(cust, dict) and cust.get('Name'):
-                            # Avoid duplicates (same customer may be stored multiple ways)
-                            if cust not in customer_candidates:
-                                customer_candidates.append(cust)
+                    # Deduplicated once at preload time rather than rescanning the lookup per row
+                    customer_candidates = self.customer_candidates
                     
                     # Try fuzzy matching if we have candidates
                     if customer_candidates:
@@ -468,106 +462,69 @@ class SalesOrderValidator:
             Dictionary mapping order_key -> list of rows in that order
         """
         groups = {}
+        if not rows:
+            return groups
         
-        # Find InvoiceNumber or SaleOrderNumber column
-        invoice_col = column_mapping.get('InvoiceNumber')
-        sale_order_col = column_mapping.get('SaleOrderNumber')
-        
-        # Debug: Log column mapping for troubleshooting
-        if rows and invoice_col:
-            # Check if invoice column exists in first row's data
-            first_row_cols = list(rows[0]['data'].keys())
-            if invoice_col not in first_row_cols:
-                # Try case-insensitive match
-                matching_col = None
-                for col in first_row_cols:
-                    if col.lower() == invoice_col.lower():
-                        matching_col = col
-                        break
-                if matching_col:
-                    invoice_col = matching_col  # Update to use the actual column name
+        # Every parsed row carries the same (header) keys, so resolve each mapped
+        # column to its actual header (case-insensitively) once instead of per row
+        headers = list(rows[0]['data'].keys())
+        headers_lower = {}
+        for col in headers:
+            headers_lower.setdefault(col.lower(), col)
+        
+        def resolve(col):
+            if not col or col in rows[0]['data']:
+                return col
+            return headers_lower.get(col.lower(), col)
         
+        # Find InvoiceNumber or SaleOrderNumber column
+        invoice_col = resolve(column_mapping.get('InvoiceNumber'))
+        sale_order_col = resolve(column_mapping.get('SaleOrderNumber'))
+        customer_col = resolve(column_mapping.get('CustomerName') or column_mapping.get('Customer'))
+        # Item columns - any of these marks a row without order/customer as a continuation line
+        item_cols = [
+            col for col in (
+                resolve(column_mapping.get('SKU') or column_mapping.get('ProductCode')),
+                resolve(column_mapping.get('Quantity') or column_mapping.get('QuantityOrdered')),
+                resolve(column_mapping.get('Price') or column_mapping.get('ExtendedPrice'))
+            ) if col
+        ]
+        
+        def value_of(data, col):
+            value = data.get(col) if col else None
+            return str(value).strip() if value else ''
+        
+        last_order_key = None
         for row in rows:
-            order_key = None
-            
-            # Skip rows that are clearly incomplete (no key identifying fields)
-            # Check if row has Order #, Invoice #, or Customer Name
-            has_order_id = False
-            has_customer = False
+            data = row['data']
             
             # Check for Order # or Invoice #
-            if invoice_col:
-                invoice_val = row['data'].get(invoice_col) or next((v for k, v in row['data'].items() if k.lower() == invoice_col.lower()), None)
-                if invoice_val and str(invoice_val).strip():
-                    order_key = str(invoice_val).strip()
-                    has_order_id = True
-            
-            if not order_key and sale_order_col:
-                so_val = row['data'].get(sale_order_col) or next((v for k, v in row['data'].items() if k.lower() == sale_order_col.lower()), None)
-                if so_val and str(so_val).strip():
-                    order_key = str(so_val).strip()
-                    has_order_id = True
+            order_key = value_of(data, invoice_col) or value_of(data, sale_order_col) or None
+            has_order_id = order_key is not None
             
             # Check for customer name
-            customer_col = column_mapping.get('CustomerName') or column_mapping.get('Customer')
-            if customer_col:
-                customer_val = row['data'].get(customer_col) or next((v for k, v in row['data'].items() if k.lower() == customer_col.lower()), None)
-                if customer_val and str(customer_val).strip():
-                    has_customer = True
+            has_customer = bool(value_of(data, customer_col))
             
             # Skip rows that don't have an order identifier AND don't have a customer
             # These are continuation rows that should be merged with previous row
             if not has_order_id and not has_customer:
-                # This is likely a continuation row - try to merge with previous order
-                # Find the most recent order that was added
-                if groups:
-                    # Get the last order key that was added (most recent)
-                    last_order_key = list(groups.keys())[-1]
-                    # Only merge if it's from a real order (not a ROW_ order)
-                    # Check if it's not a ROW_ order (ROW_ orders are fallback row numbers)
-                    if not last_order_key.startswith('ROW_'):
-                        # Check if this row has item data (SKU, quantity) - if so, it's a continuation
-                        sku_col = column_mapping.get('SKU') or column_mapping.get('ProductCode')
-                        has_item = False
-                        if sku_col:
-                            sku_val = row['data'].get(sku_col) or next((v for k, v in row['data'].items() if k.lower() == sku_col.lower()), None)
-                            if sku_val and str(sku_val).strip():
-                                has_item = True
-                        
-                        # If row has quantity or item data, merge with previous order
-                        qty_col = column_mapping.get('Quantity') or column_mapping.get('QuantityOrdered')
-                        has_quantity = False
-                        if qty_col:
-                            qty_val = row['data'].get(qty_col) or next((v for k, v in row['data'].items() if k.lower() == qty_col.lower()), None)
-                            if qty_val and str(qty_val).strip():
-                                has_quantity = True
-                        
-                        # Also check for price/extended price fields
-                        price_col = column_mapping.get('Price') or column_mapping.get('ExtendedPrice')
-                        has_price = False
-                        if price_col:
-                            price_val = row['data'].get(price_col) or next((v for k, v in row['data'].items() if k.lower() == price_col.lower()), None)
-                            if price_val and str(price_val).strip():
-                                has_price = True
-                        
-                        # If row has item, quantity, or price data, it's a continuation - merge with previous order
-                        if has_item or has_quantity or has_price:
-                            groups[last_order_key].append(row)
-                            continue
+                # Only merge into a real order (ROW_ orders are fallback row numbers)
+                # and only if this row has item, quantity, or price data
+                if last_order_key is not None and not last_order_key.startswith('ROW_'):
+                    if any(value_of(data, col) for col in item_cols):
+                        groups[last_order_key].append(row)
+                        continue
                 
                 # If no previous order to merge with, skip this incomplete row entirely
                 continue
             
-            # If no grouping key found and row has customer/order data, treat as separate order
+            # No grouping key but the row has customer data - treat as separate order
             if not order_key:
-                if has_customer or has_order_id:
-                    order_key = f"ROW_{row['row_number']}"
-                else:
-                    # Skip completely empty/incomplete rows
-                    continue
+                order_key = f"ROW_{row['row_number']}"
             
             if order_key not in groups:
                 groups[order_key] = []
+                last_order_key = order_key
             groups[order_key].append(row)
         
         return groups
@@ -806,6 +763,7 @@ class SalesOrderValidator:
         self.product_cache.clear()
         self.customer_lookup.clear()
         self.product_lookup.clear()
+        self.customer_candidates = []
         self.customers_loaded = False
         self.products_loaded = False
     
@@ -830,10 +788,11 @@ class SalesOrderValidator:
         if db_session and client_erp_credentials_id:
             try:
                 from database import CachedCustomer, CachedProduct
-                cached_customers = db_session.query(CachedCustomer).filter_by(
+                # Only the JSON payloads are needed - skip building ORM objects for every cached row
+                cached_customers = db_session.query(CachedCustomer.customer_data).filter_by(
                     client_erp_credentials_id=client_erp_credentials_id
                 ).all()
-                cached_products = db_session.query(CachedProduct).filter_by(
+                cached_products = db_session.query(CachedProduct.product_data).filter_by(
                     client_erp_credentials_id=client_erp_credentials_id
                 ).all()
                 
@@ -885,6 +844,20 @@ class SalesOrderValidator:
                         self.customer_lookup[f"_attr1:{attr1_clean.upper()}"] = customer
                         self.customer_lookup[f"_attr1:{attr1_clean.lower()}"] = customer
             
+            # Name-match candidates: every customer reachable by ID or name, once each
+            self.customer_candidates = []
+            seen_ids = set()
+            for customer in customers:
+                name = customer.get('Name')
+                if not name or not (customer.get('ID') or name.strip()):
+                    continue
+                customer_id = customer.get('ID')
+                if customer_id:
+                    if customer_id in seen_ids:
+                        continue
+                    seen_ids.add(customer_id)
+                self.customer_candidates.append(customer)
+            
             self.customers_loaded = True
         except Exception as e:
             print(f"Error preloading customers: {str(e)}")
@@ -1,8 +1,8 @@
 """Database setup and models for Cin7 Uploader"""
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, JSON, UniqueConstraint, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, JSON, UniqueConstraint, Float, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 import uuid
 
@@ -138,15 +138,27 @@ class SalesOrderUpload(db.Model):
     total_rows = Column(Integer, nullable=False)
     successful_orders = Column(Integer, default=0, nullable=False)
     failed_orders = Column(Integer, default=0, nullable=False)
-    status = Column(String(50), nullable=False)  # 'pending', 'processing', 'completed', 'failed'
+    status = Column(String(50), nullable=False)  # 'pending', 'queued', 'processing', 'completed', 'failed', 'duplicate'
     error_log = Column(JSON, nullable=True)  # Array of errors
-    csv_content = Column(Text, nullable=True)  # Base64 encoded CSV content for preview
+    # Raw CSV bytes, kept for preview and retries. Deferred so loading an upload for its
+    # other columns never pulls the file - callers that need it use undefer()
+    csv_content = deferred(Column(LargeBinary, nullable=True))
+    content_hash = Column(String(32), nullable=True)  # BLAKE2b digest of csv_content, for duplicate detection
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     completed_at = Column(DateTime, nullable=True)
     
     # Relationships
     client = relationship('Client', back_populates='uploads')
-    results = relationship('SalesOrderResult', back_populates='upload', cascade='all, delete-orphan')
+    results = relationship('SalesOrderResult', back_populates='upload', cascade='all, delete-orphan',
+                           order_by='SalesOrderResult.created_at')
+
+
+# Queue listing: filter by client/status, newest first
+Index('ix_uploads_client_status_created',
+      SalesOrderUpload.client_id, SalesOrderUpload.status, SalesOrderUpload.created_at.desc())
+# Webhook duplicate check: same CSV content for the same connection, most recent first
+Index('ix_uploads_cred_hash_created',
+      SalesOrderUpload.client_erp_credentials_id, SalesOrderUpload.content_hash, SalesOrderUpload.created_at.desc())
 
 
 class SalesOrderResult(db.Model):
@@ -180,6 +192,18 @@ class SalesOrderResult(db.Model):
     upload = relationship('SalesOrderUpload', back_populates='results')
 
 
+# An upload's results in processing order
+Index('ix_results_upload_created', SalesOrderResult.upload_id, SalesOrderResult.created_at)
+# Failed/completed order listings: filter by status, keyset-paginated newest first
+Index('ix_results_status_created_id',
+      SalesOrderResult.status, SalesOrderResult.created_at.desc(), SalesOrderResult.id.desc())
+# Default failed-orders listing (unresolved only) - partial, so resolved failures and
+# successes don't make it any bigger
+Index('ix_results_failed_unresolved',
+      SalesOrderResult.created_at.desc(), SalesOrderResult.id.desc(),
+      postgresql_where=(SalesOrderResult.status == 'failed') & SalesOrderResult.resolved_at.is_(None))
+
+
 class Cin7ApiLog(db.Model):
     """Log of API calls to Cin7"""
     __tablename__ = 'cin7_api_log'
@@ -204,6 +228,7 @@ class Cin7ApiLog(db.Model):
     request_body = Column(JSON, nullable=True)  # Request payload
     response_status = Column(Integer, nullable=True)  # HTTP status code
     response_body = Column(JSON, nullable=True)  # Response data
+    raw_response_body_text = Column(Text, nullable=True)  # Raw JSON response text (preserves key order)
     error_message = Column(Text, nullable=True)  # Error message if failed
     duration_ms = Column(Integer, nullable=True)  # Request duration in milliseconds
     
@@ -213,6 +238,10 @@ class Cin7ApiLog(db.Model):
     # Client names are retrieved via raw SQL queries joining through voyager.client_erp_credentials
 
 
+# An upload's API logs in call order
+Index('ix_api_log_upload_created', Cin7ApiLog.upload_id, Cin7ApiLog.created_at)
+
+
 class PasswordResetToken(db.Model):
     """Password reset tokens - stored in database for persistence"""
     __tablename__ = 'password_reset_token'
@@ -459,6 +459,8 @@ const QueueView = () => {
     switch (status) {
       case 'completed':
         return <Badge variant="default" className="bg-green-500 shadow-none hover:bg-green-500 px-1.5 py-0 text-[10px]">Completed</Badge>;
+      case 'queued':
+        return <Badge variant="secondary" className="shadow-none hover:bg-secondary px-1.5 py-0 text-[10px]">Queued</Badge>;
       case 'processing':
         return <Badge variant="default" className="bg-blue-500 shadow-none hover:bg-blue-500 px-1.5 py-0 text-[10px]">Processing</Badge>;
       case 'failed':
@@ -1545,7 +1547,7 @@ const QueueView = () => {
                                   >
                                     {isExpanded ? 'Hide Details' : 'See Details'}
                                   </Button>
-                                  {(order.sale_payload || order.sale_order_payload || order.what_is_needed || order.order_data) && (
+                                  {(order.sale_payload || order.sale_order_payload || order.what_is_needed || order.matching_details) && (
                                     <Button
                                       variant="ghost"
                                       size="sm"
@@ -1604,13 +1606,13 @@ const QueueView = () => {
             <DialogDescription>
               {viewingOrderPayload?.order_results && Array.isArray(viewingOrderPayload.order_results)
                 ? `API logs for upload: ${viewingOrderPayload.upload?.filename || 'N/A'}`
-                : viewingOrderPayload?.order_data?.attempted_send === false 
+                : viewingOrderPayload?.attempted_send === false 
                   ? "Prepared payloads (not sent to Cin7)" 
                   : "Payloads sent to Cin7"}
             </DialogDescription>
           </DialogHeader>
           <div className="flex-1 overflow-auto space-y-6">
-            {viewingOrderPayload?.order_data?.attempted_send === false && (
+            {viewingOrderPayload?.attempted_send === false && (
               <div className="p-3 bg-yellow-50 rounded border border-yellow-200 text-sm text-yellow-800">
                 <strong>Note:</strong> These payloads were not sent to Cin7 because the customer was not found.
               </div>
@@ -1637,8 +1639,8 @@ const QueueView = () => {
               }
               
               // Matching details errors
-              if (viewingOrderPayload?.order_data?.matching_details) {
-                const md = viewingOrderPayload.order_data.matching_details;
+              if (viewingOrderPayload?.matching_details) {
+                const md = viewingOrderPayload.matching_details;
                 
                 // Customer errors
                 if (md.customer && !md.customer.found && md.customer.error) {
@@ -0,0 +1,39 @@
+"""Add a partial index for unresolved failed orders and an API log index
+
+Revision ID: add_failed_orders_partial_index
+Revises: add_results_status_keyset_index
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_failed_orders_partial_index'
+down_revision = 'add_results_status_keyset_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves the default failed-orders listing: status = 'failed' AND resolved_at IS NULL,
+    # newest first with the (created_at, id) cursor
+    op.create_index(
+        'ix_results_failed_unresolved',
+        'sales_order_result',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        schema='cin7_uploader',
+        postgresql_where=sa.text("status = 'failed' AND resolved_at IS NULL")
+    )
+    # Serves loading an upload's API logs in created_at order
+    op.create_index(
+        'ix_api_log_upload_created',
+        'cin7_api_log',
+        ['upload_id', 'created_at'],
+        schema='cin7_uploader'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_api_log_upload_created', table_name='cin7_api_log', schema='cin7_uploader')
+    op.drop_index('ix_results_failed_unresolved', table_name='sales_order_result', schema='cin7_uploader')
@@ -0,0 +1,37 @@
+"""Add composite indexes for the upload queue and order result listings
+
+Revision ID: add_queue_composite_indexes
+Revises: add_customer_defaults_to_cred
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_queue_composite_indexes'
+down_revision = 'add_customer_defaults_to_cred'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves the queue filters: client_id/status equality + ORDER BY created_at DESC
+    op.create_index(
+        'ix_uploads_client_status_created',
+        'sales_order_upload',
+        ['client_id', 'status', sa.text('created_at DESC')],
+        schema='cin7_uploader'
+    )
+    # Serves loading an upload's results in created_at order
+    op.create_index(
+        'ix_results_upload_created',
+        'sales_order_result',
+        ['upload_id', 'created_at'],
+        schema='cin7_uploader'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_results_upload_created', table_name='sales_order_result', schema='cin7_uploader')
+    op.drop_index('ix_uploads_client_status_created', table_name='sales_order_upload', schema='cin7_uploader')
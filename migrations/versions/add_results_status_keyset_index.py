@@ -0,0 +1,29 @@
+"""Add a status + keyset index for the failed/completed order listings
+
+Revision ID: add_results_status_keyset_index
+Revises: add_upload_content_hash
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_results_status_keyset_index'
+down_revision = 'add_upload_content_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves status equality + ORDER BY created_at DESC, id DESC and the (created_at, id) cursor
+    op.create_index(
+        'ix_results_status_created_id',
+        'sales_order_result',
+        ['status', sa.text('created_at DESC'), sa.text('id DESC')],
+        schema='cin7_uploader'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_results_status_created_id', table_name='sales_order_result', schema='cin7_uploader')
@@ -0,0 +1,40 @@
+"""Add content_hash to sales_order_upload for duplicate detection
+
+Revision ID: add_upload_content_hash
+Revises: add_upload_duplicate_index
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_upload_content_hash'
+down_revision = 'add_upload_duplicate_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('sales_order_upload',
+                  sa.Column('content_hash', sa.String(length=32), nullable=True),
+                  schema='cin7_uploader')
+    # The duplicate check now matches on content instead of filename
+    op.drop_index('ix_uploads_cred_filename_created', table_name='sales_order_upload', schema='cin7_uploader')
+    op.create_index(
+        'ix_uploads_cred_hash_created',
+        'sales_order_upload',
+        ['client_erp_credentials_id', 'content_hash', sa.text('created_at DESC')],
+        schema='cin7_uploader'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_uploads_cred_hash_created', table_name='sales_order_upload', schema='cin7_uploader')
+    op.create_index(
+        'ix_uploads_cred_filename_created',
+        'sales_order_upload',
+        ['client_erp_credentials_id', 'filename', sa.text('created_at DESC')],
+        schema='cin7_uploader'
+    )
+    op.drop_column('sales_order_upload', 'content_hash', schema='cin7_uploader')
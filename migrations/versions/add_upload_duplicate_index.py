@@ -0,0 +1,29 @@
+"""Add an index for the webhook duplicate-upload check
+
+Revision ID: add_upload_duplicate_index
+Revises: csv_content_to_bytea
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_upload_duplicate_index'
+down_revision = 'csv_content_to_bytea'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves receive_email_webhook's lookup: credentials + filename equality, newest first
+    op.create_index(
+        'ix_uploads_cred_filename_created',
+        'sales_order_upload',
+        ['client_erp_credentials_id', 'filename', sa.text('created_at DESC')],
+        schema='cin7_uploader'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_uploads_cred_filename_created', table_name='sales_order_upload', schema='cin7_uploader')
@@ -0,0 +1,38 @@
+"""Store sales_order_upload.csv_content as raw bytes
+
+Revision ID: csv_content_to_bytea
+Revises: add_queue_composite_indexes
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'csv_content_to_bytea'
+down_revision = 'add_queue_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows hold base64 text - decode them in place
+    op.alter_column(
+        'sales_order_upload',
+        'csv_content',
+        type_=sa.LargeBinary(),
+        existing_nullable=True,
+        postgresql_using="decode(csv_content, 'base64')",
+        schema='cin7_uploader'
+    )
+
+
+def downgrade():
+    op.alter_column(
+        'sales_order_upload',
+        'csv_content',
+        type_=sa.Text(),
+        existing_nullable=True,
+        postgresql_using="encode(csv_content, 'base64')",
+        schema='cin7_uploader'
+    )
@@ -5,6 +5,7 @@ from database import db, UserClient
 from sqlalchemy import text
 from routes.admin import provision_admins_to_client, is_global_admin, get_user_id
 from routes.auth import User
+from utils.client_settings import clear_client_name_cache, clear_client_lookup_cache
 import uuid
 
 clients_bp = Blueprint('clients', __name__)
@@ -298,6 +299,8 @@ def update_client(client_id):
         
         result = db.session.execute(query, params)
         db.session.commit()
+        clear_client_name_cache()
+        clear_client_lookup_cache()
         
         row = result.fetchone()
         if not row:
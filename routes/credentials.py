@@ -7,6 +7,7 @@ from sqlalchemy import text, desc
 import uuid
 import time
 from cin7_sales.api_client import Cin7SalesAPI
+from utils.client_settings import load_settings_bundle, clear_client_lookup_cache
 
 credentials_bp = Blueprint('credentials', __name__)
 
@@ -200,6 +201,8 @@ def set_credentials(client_id):
             })
         
         db.session.commit()
+        load_settings_bundle.cache_clear()
+        clear_client_lookup_cache()
         row = result.fetchone()
         
         return jsonify({
@@ -232,6 +235,8 @@ def delete_credentials(client_id):
         """)
         result = db.session.execute(delete_query, {'client_id': client_uuid})
         db.session.commit()
+        load_settings_bundle.cache_clear()
+        clear_client_lookup_cache()
         
         if result.rowcount == 0:
             return jsonify({'error': 'Credentials not found'}), 404
@@ -353,6 +358,8 @@ def update_credential_settings(client_id):
         
         result = db.session.execute(query, params)
         db.session.commit()
+        load_settings_bundle.cache_clear()
+        clear_client_lookup_cache()
         
         row = result.fetchone()
         if not row:
@@ -2,6 +2,7 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database import db, ClientCsvMapping
+from utils.client_settings import load_default_column_mapping
 from sqlalchemy import text
 import uuid
 from datetime import datetime
@@ -161,6 +162,7 @@ def create_mapping():
         
         db.session.add(mapping)
         db.session.commit()
+        load_default_column_mapping.cache_clear()
         
         return jsonify({
             'id': str(mapping.id),
@@ -234,6 +236,7 @@ def update_mapping(mapping_id):
         mapping.updated_at = datetime.utcnow()
         
         db.session.commit()
+        load_default_column_mapping.cache_clear()
         
         return jsonify({
             'id': str(mapping.id),
@@ -275,6 +278,7 @@ def delete_mapping(mapping_id):
         
         db.session.delete(mapping)
         db.session.commit()
+        load_default_column_mapping.cache_clear()
         
         return jsonify({'message': 'Mapping deleted successfully'}), 200
     except Exception as e:
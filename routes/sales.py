@@ -2,12 +2,14 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import logging
-from database import db, Client, ClientCin7Credentials, ClientSettings, ClientCsvMapping, SalesOrderUpload, UserClient, Cin7ApiLog
+from database import db, Client, ClientCin7Credentials, ClientSettings, ClientCsvMapping, SalesOrderUpload, UserClient
 from cin7_sales.api_client import Cin7SalesAPI
 from cin7_sales.csv_parser import CSVParser
 from cin7_sales.validator import SalesOrderValidator
 from cin7_sales.sales_order_builder import SalesOrderBuilder
 from routes.auth import User
+from utils.api_logs import ApiLogBuffer
+from utils.client_settings import customer_columns_present, load_default_column_mapping, load_settings_bundle
 from sqlalchemy import text
 import uuid
 import os
@@ -282,6 +284,7 @@ def set_mapping():
             db.session.add(mapping)
         
         db.session.commit()
+        load_default_column_mapping.cache_clear()
     
     return jsonify({'message': 'Mapping saved'}), 200
 
@@ -383,6 +386,7 @@ def validate_data():
     default_status = cred_row.default_status
     
     # Extract customer default fields
+    existing_customer_cols = customer_columns_present()
     customer_account_receivable = None
     customer_revenue_account = None
     customer_tax_rule = None
@@ -440,62 +444,33 @@ def validate_data():
     
     logger.info(f"DEBUG: Using credential_id {credential_id_for_logging} for API logging")
     
-    # Create logging callback for validation API calls
+    # Create logging callback for validation API calls - rows are buffered and
+    # written in batches instead of one commit per API call
+    api_log_buffer = ApiLogBuffer()
+    
     def log_api_call(endpoint, method, request_url, request_headers, request_body,
                      response_status, response_body, error_message, duration_ms):
         """Callback to log API calls to database"""
         try:
-            # Create log entry - try with trigger first, fallback without if column doesn't exist
-            try:
-                log_entry = Cin7ApiLog(
-                    id=uuid.uuid4(),
-                    client_id=credential_id_for_logging,
-                    user_id=user_id,
-                    upload_id=None,
-                    trigger='validation',
-                    endpoint=endpoint,
-                    method=method,
-                    request_url=request_url,
-                    request_headers=request_headers,
-                    request_body=request_body,
-                    response_status=response_status,
-                    response_body=response_body,
-                    error_message=error_message,
-                    duration_ms=duration_ms
-                )
-                db.session.add(log_entry)
-                db.session.commit()
-            except Exception as trigger_error:
-                # If trigger column doesn't exist, try without it
-                error_str = str(trigger_error).lower()
-                if 'trigger' in error_str or 'column' in error_str:
-                    db.session.rollback()
-                    log_entry = Cin7ApiLog(
-                        id=uuid.uuid4(),
-                        client_id=credential_id_for_logging,
-                        user_id=user_id,
-                        upload_id=None,
-                        endpoint=endpoint,
-                        method=method,
-                        request_url=request_url,
-                        request_headers=request_headers,
-                        request_body=request_body,
-                        response_status=response_status,
-                        response_body=response_body,
-                        error_message=error_message,
-                        duration_ms=duration_ms
-                    )
-                    db.session.add(log_entry)
-                    db.session.commit()
-                else:
-                    raise
-            
-            logger.info(f"✓ Logged API call: {method} {endpoint} - Status: {response_status}, credential_id: {credential_id_for_logging}, user_id: {user_id}, trigger: validation")
+            api_log_buffer.add({
+                'id': uuid.uuid4(),
+                'client_id': credential_id_for_logging,
+                'user_id': user_id,
+                'upload_id': None,
+                'trigger': 'validation',
+                'endpoint': endpoint,
+                'method': method,
+                'request_url': request_url,
+                'request_headers': request_headers,
+                'request_body': request_body,
+                'response_status': response_status,
+                'response_body': response_body,
+                'error_message': error_message,
+                'duration_ms': duration_ms,
+                'created_at': datetime.utcnow()
+            })
         except Exception as e:
             logger.error(f"✗ Error logging API call: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            db.session.rollback()
     
     # Initialize API client with logging
     logger.info(f"DEBUG: Initializing API client with logger_callback for validation")
@@ -538,12 +513,16 @@ def validate_data():
         preloaded_products=getattr(validator, 'product_lookup', {})  # Pass preloaded product lookup
     )
     
-    valid_rows, invalid_rows = validator.validate_batch(
-        session['rows'],
-        column_mapping,
-        settings,
-        builder=builder  # Pass builder to generate preview payloads
-    )
+    try:
+        valid_rows, invalid_rows = validator.validate_batch(
+            session['rows'],
+            column_mapping,
+            settings,
+            builder=builder  # Pass builder to generate preview payloads
+        )
+    finally:
+        # Write any API log rows still buffered (preload + validation calls)
+        api_log_buffer.flush()
     
     # Store validated rows
     session['validated_rows'] = {
@@ -590,123 +569,17 @@ def create_sales_orders():
     
     # Get credentials from voyager.client_erp_credentials
     client_erp_credentials_id = session.get('client_erp_credentials_id', session['client_id'])
-    # Check which customer default columns exist
-    check_customer_cols_query = text("""
-        SELECT column_name 
-        FROM information_schema.columns 
-        WHERE table_schema = 'voyager' 
-        AND table_name = 'client_erp_credentials' 
-        AND column_name IN ('customer_account_receivable', 'customer_revenue_account', 'customer_tax_rule', 'customer_attribute_set')
-    """)
-    existing_customer_cols = {row[0] for row in db.session.execute(check_customer_cols_query).fetchall()}
-    
-    # Build SELECT fields
-    select_fields = [
-        'cec.id',
-        'cec.cin7_api_auth_accountid as account_id',
-        'cec.cin7_api_auth_applicationkey as application_key',
-        'cec.sale_type',
-        'cec.tax_rule',
-        'cec.default_status'
-    ]
-    
-    if 'customer_account_receivable' in existing_customer_cols:
-        select_fields.append('cec.customer_account_receivable')
-    else:
-        select_fields.append('NULL as customer_account_receivable')
-    
-    if 'customer_revenue_account' in existing_customer_cols:
-        select_fields.append('cec.customer_revenue_account')
-    else:
-        select_fields.append('NULL as customer_revenue_account')
-    
-    if 'customer_tax_rule' in existing_customer_cols:
-        select_fields.append('cec.customer_tax_rule')
-    else:
-        select_fields.append('NULL as customer_tax_rule')
-    
-    if 'customer_attribute_set' in existing_customer_cols:
-        select_fields.append('cec.customer_attribute_set')
-    else:
-        select_fields.append('NULL as customer_attribute_set')
-    
-    query = text(f"""
-        SELECT 
-            {', '.join(select_fields)}
-        FROM voyager.client_erp_credentials cec
-        WHERE cec.erp = 'cin7_core'
-        AND cec.id = :cred_id
-    """)
-    result = db.session.execute(query, {'cred_id': client_erp_credentials_id})
-    cred_row = result.fetchone()
-    
-    if not cred_row or not cred_row.account_id or not cred_row.application_key:
+    # Credentials, client_id and ClientSettings in one query - read uncached so settings
+    # just saved in the UI apply even if another worker handled the save
+    bundle = load_settings_bundle.__wrapped__(str(client_erp_credentials_id))
+    if not bundle:
         return jsonify({'error': 'Cin7 credentials not configured'}), 400
     
-    account_id = cred_row.account_id
-    application_key = cred_row.application_key
-    sale_type = cred_row.sale_type
-    tax_rule = cred_row.tax_rule
-    default_status = cred_row.default_status
-    
-    # Extract customer default fields
-    customer_account_receivable = None
-    customer_revenue_account = None
-    customer_tax_rule = None
-    customer_attribute_set = None
-    
-    if 'customer_account_receivable' in existing_customer_cols and hasattr(cred_row, 'customer_account_receivable'):
-        # Account codes are stored as strings
-        customer_account_receivable = cred_row.customer_account_receivable if cred_row.customer_account_receivable else None
-    if 'customer_revenue_account' in existing_customer_cols and hasattr(cred_row, 'customer_revenue_account'):
-        # Account codes are stored as strings
-        customer_revenue_account = cred_row.customer_revenue_account if cred_row.customer_revenue_account else None
-    if 'customer_tax_rule' in existing_customer_cols and hasattr(cred_row, 'customer_tax_rule'):
-        customer_tax_rule = str(cred_row.customer_tax_rule) if cred_row.customer_tax_rule else None
-    if 'customer_attribute_set' in existing_customer_cols and hasattr(cred_row, 'customer_attribute_set'):
-        customer_attribute_set = cred_row.customer_attribute_set
-    
-    # Get settings (try to find by client_id from client_erp_credentials, or use defaults)
-    settings_obj = None
-    # Try to get client_id from client_erp_credentials
-    client_query = text("""
-        SELECT client_id FROM voyager.client_erp_credentials
-        WHERE id = :cred_id
-    """)
-    client_result = db.session.execute(client_query, {'cred_id': client_erp_credentials_id})
-    client_row = client_result.fetchone()
-    if client_row and client_row.client_id:
-        settings_obj = ClientSettings.query.filter_by(client_id=client_row.client_id).first()
-    settings = {}
-    if settings_obj:
-        settings = {
-            'default_status': default_status or settings_obj.default_status,
-            'default_currency': settings_obj.default_currency,
-            'tax_inclusive': settings_obj.tax_inclusive,
-            'default_location': settings_obj.default_location,
-            'default_delay_between_orders': settings_obj.default_delay_between_orders,
-            'sale_type': sale_type,
-            'tax_rule': tax_rule,
-            'customer_account_receivable': customer_account_receivable,
-            'customer_revenue_account': customer_revenue_account,
-            'customer_tax_rule': customer_tax_rule,
-            'customer_attribute_set': customer_attribute_set
-        }
-    else:
-        # Use defaults from client_erp_credentials
-        settings = {
-            'default_status': default_status or 'DRAFT',
-            'default_currency': 'USD',
-            'tax_inclusive': False,
-            'default_location': None,
-            'default_delay_between_orders': 0.7,
-            'sale_type': sale_type,
-            'tax_rule': tax_rule,
-            'customer_account_receivable': customer_account_receivable,
-            'customer_revenue_account': customer_revenue_account,
-            'customer_tax_rule': customer_tax_rule,
-            'customer_attribute_set': customer_attribute_set
-        }
+    creds, cached_settings = bundle
+    account_id = creds['account_id']
+    application_key = creds['application_key']
+    # Copy so per-request tweaks never leak back into the shared cache entry
+    settings = dict(cached_settings)
     
     builder = SalesOrderBuilder(settings, None)  # Will set api_client later
     column_mapping = session.get('column_mapping', {})
@@ -718,9 +591,7 @@ def create_sales_orders():
     credential_id_for_logging = client_erp_credentials_id
     
     # Get client_id for upload record (may be None for standalone connections)
-    client_id_for_upload = None
-    if client_row and client_row.client_id:
-        client_id_for_upload = client_row.client_id
+    client_id_for_upload = creds['client_id']
     
     # Create upload record first (client_id can be None for standalone connections)
     upload = SalesOrderUpload(
@@ -736,60 +607,34 @@ def create_sales_orders():
     db.session.add(upload)
     db.session.commit()
     
-    # Create logging callback (after upload is created)
+    # Create logging callback (after upload is created) - rows are buffered and
+    # written in batches instead of one commit per API call
+    api_log_buffer = ApiLogBuffer()
+    
     def log_api_call(endpoint, method, request_url, request_headers, request_body,
                      response_status, response_body, error_message, duration_ms):
         """Callback to log API calls to database"""
         try:
-            # Create log entry - handle trigger column gracefully if it doesn't exist yet
-            # Create log entry - try with trigger first, fallback without if column doesn't exist
-            try:
-                log_entry = Cin7ApiLog(
-                    id=uuid.uuid4(),
-                    client_id=credential_id_for_logging,
-                    user_id=user_id,
-                    upload_id=upload.id,
-                    trigger='upload',
-                    endpoint=endpoint,
-                    method=method,
-                    request_url=request_url,
-                    request_headers=request_headers,
-                    request_body=request_body,
-                    response_status=response_status,
-                    response_body=response_body,
-                    error_message=error_message,
-                    duration_ms=duration_ms
-                )
-                db.session.add(log_entry)
-                db.session.commit()
-            except Exception as trigger_error:
-                # If trigger column doesn't exist, try without it
-                error_str = str(trigger_error).lower()
-                if 'trigger' in error_str or 'column' in error_str:
-                    db.session.rollback()
-                    log_entry = Cin7ApiLog(
-                        id=uuid.uuid4(),
-                        client_id=credential_id_for_logging,
-                        user_id=user_id,
-                        upload_id=upload.id,
-                        endpoint=endpoint,
-                        method=method,
-                        request_url=request_url,
-                        request_headers=request_headers,
-                        request_body=request_body,
-                        response_status=response_status,
-                        response_body=response_body,
-                        error_message=error_message,
-                        duration_ms=duration_ms
-                    )
-                    db.session.add(log_entry)
-                    db.session.commit()
-                else:
-                    raise
+            api_log_buffer.add({
+                'id': uuid.uuid4(),
+                'client_id': credential_id_for_logging,
+                'user_id': user_id,
+                'upload_id': upload.id,
+                'trigger': 'upload',
+                'endpoint': endpoint,
+                'method': method,
+                'request_url': request_url,
+                'request_headers': request_headers,
+                'request_body': request_body,
+                'response_status': response_status,
+                'response_body': response_body,
+                'error_message': error_message,
+                'duration_ms': duration_ms,
+                'created_at': datetime.utcnow()
+            })
         except Exception as e:
-            print(f"Error logging API call: {str(e)}")
             # Don't fail the request if logging fails
-            db.session.rollback()
+            print(f"Error logging API call: {str(e)}")
     
     # Initialize API client and builder with logging
     api_client = Cin7SalesAPI(
@@ -824,6 +669,7 @@ def create_sales_orders():
         )
     
     if not valid_rows:
+        api_log_buffer.flush()
         return jsonify({'error': 'No valid rows to process'}), 400
     
     # Process rows
@@ -919,6 +765,8 @@ def create_sales_orders():
                 'error': str(e)
             })
     
+    api_log_buffer.flush()
+    
     # Update upload record
     upload.successful_orders = len(successful)
     upload.failed_orders = len(failed)
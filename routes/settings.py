@@ -3,6 +3,7 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database import db, ClientSettings, Client, UserClient, Cin7ApiLog
 from routes.auth import User  # Import User model from auth
+from utils.client_settings import load_settings_bundle
 from sqlalchemy import desc, text
 import uuid
 
@@ -181,6 +182,7 @@ def set_settings(client_id):
         db.session.add(settings)
     
     db.session.commit()
+    load_settings_bundle.cache_clear()
     
     return jsonify({
         'id': str(settings.id),
@@ -236,6 +238,7 @@ def reset_settings(client_id):
         settings.default_batch_delay = 45.0
         settings.updated_at = db.func.now()
         db.session.commit()
+        load_settings_bundle.cache_clear()
     else:
         # No settings to reset
         return jsonify({'message': 'No settings to reset'}), 200
@@ -1,25 +1,102 @@
 """Webhook routes for email automation"""
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
+import atexit
 import logging
+import hashlib
+import json
+import orjson
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import uuid
-import time
 import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
-from database import db, SalesOrderUpload, SalesOrderResult, ClientSettings, ClientCsvMapping, Cin7ApiLog, Client
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Tuple, Mapping
+from functools import lru_cache
+from database import db, SalesOrderUpload, SalesOrderResult, Client
 from cin7_sales.api_client import Cin7SalesAPI
 from cin7_sales.csv_parser import CSVParser
 from cin7_sales.validator import SalesOrderValidator
 from cin7_sales.sales_order_builder import SalesOrderBuilder
-from sqlalchemy import text, func
+from cin7_sales.rate_limiter import RateLimiter
+from sqlalchemy import text, func, select, update, tuple_, literal_column, or_, and_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import selectinload, undefer, defer
 from routes.auth import User
+from utils.responses import orjson_response, orjson_stream_response, json_body_response
+from utils.api_logs import ApiLogBuffer
+from utils.client_settings import get_client_name, load_default_column_mapping, load_settings_bundle, lookup_client_by_name
 
 webhooks_bp = Blueprint('webhooks', __name__)
 logger = logging.getLogger(__name__)
 
+_UUID_RE = re.compile(r'\A[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\Z')
+
+# Subject line patterns for extract_client_name_from_subject
+_SUBJECT_ARROW_RE = re.compile(r'->(.*?)Daily Sales Orders', re.S)
+_SUBJECT_DAILY_RE = re.compile(
+    r'(?:Scheduled Report\s*[-:]?\s*)?(?:Report\s*[-:]?\s*)?(?:Orders\s*[-:]?\s*)?(.*?)\s*Daily Sales Orders',
+    re.S
+)
+_SUBJECT_DASH_RE = re.compile(r'-(.*)', re.S)
+
+# Attachment MIME types (or bare subtypes, as Missive's sub_type gives them) treated as CSV
+_CSV_MIME_TYPES = frozenset({
+    'csv', 'x-csv', 'comma-separated-values',
+    'text/csv', 'text/x-csv', 'application/csv', 'application/x-csv', 'text/comma-separated-values'
+})
+
+# Case-insensitive keyword patterns for categorize_error
+_ERROR_CUSTOMER_RE = re.compile(r'customer', re.I)
+_ERROR_NOT_FOUND_RE = re.compile(r'not ?found', re.I)
+_ERROR_MISSING_RE = re.compile(r'required|missing', re.I)
+_ERROR_API_RE = re.compile(r'40[04]|api', re.I)
+
+# Largest CSV attachment the webhook will download (bytes)
+MAX_CSV_DOWNLOAD_BYTES = int(os.environ.get('MAX_CSV_DOWNLOAD_BYTES', str(25 * 1024 * 1024)))
+
+# Reused for attachment downloads so repeat webhooks keep their connection to the attachment host
+_download_session = requests.Session()
+_download_session.mount('https://', HTTPAdapter(
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(['GET']), raise_on_status=False)
+))
+
+# Store every row's mapped columns in order_data['all_rows'] (large for multi-line orders)
+STORE_ROW_DETAILS = os.environ.get('STORE_ROW_DETAILS', 'false').lower() == 'true'
+# Also store the Cin7 responses for successful orders (failed orders always keep them)
+STORE_SUCCESS_API_RESPONSES = os.environ.get('STORE_SUCCESS_API_RESPONSES', 'false').lower() == 'true'
+
+# Orders from one upload processed at the same time (the Cin7 rate limit still applies across them)
+WEBHOOK_ORDER_WORKERS = int(os.environ.get('WEBHOOK_ORDER_WORKERS', '3'))
+
+# Uploads still 'queued' after this many seconds were lost by a restarted worker and are re-queued
+WEBHOOK_REQUEUE_AFTER = int(os.environ.get('WEBHOOK_REQUEUE_AFTER', '600'))
+
+# Orders still 'processing' this many seconds after a retry claimed them were cut off
+# (restart, deploy) and can be claimed again
+ORDER_RETRY_STALE_AFTER = int(os.environ.get('ORDER_RETRY_STALE_AFTER', '600'))
+
+# Webhook uploads processed at the same time per process (each also runs WEBHOOK_ORDER_WORKERS order threads)
+WEBHOOK_WORKERS = int(os.environ.get('WEBHOOK_WORKERS', '2'))
+
+# Bounded pool for webhook uploads - a burst of emails queues up here instead of
+# starting one thread (and one set of DB connections) per upload
+_webhook_executor = ThreadPoolExecutor(max_workers=WEBHOOK_WORKERS, thread_name_prefix='webhook-upload')
+# Uploads not yet started stay 'queued' in the database and are picked up again by
+# _requeue_stale_uploads, so shutdown only drops them from this process
+atexit.register(_webhook_executor.shutdown, wait=False, cancel_futures=True)
+# Upload IDs submitted to _webhook_executor in this process and not finished yet
+_pending_uploads = set()
+_pending_uploads_lock = threading.Lock()
+
 
 def extract_client_name_from_subject(subject: str) -> Optional[str]:
     """
@@ -39,97 +116,61 @@ def extract_client_name_from_subject(subject: str) -> Optional[str]:
     
     subject = subject.strip()
     
+    # Every pattern below needs "Orders" - most unrelated subjects stop here without running a regex
+    if 'Orders' not in subject:
+        return None
+    
     # Primary pattern: "Scheduled Report -> {Client Name} Daily Sales Orders"
-    if '->' in subject and 'Daily Sales Orders' in subject:
-        parts = subject.split('->', 1)
-        if len(parts) == 2:
-            client_part = parts[1].split('Daily Sales Orders', 1)[0].strip()
-            # Clean up any leading/trailing whitespace or dashes
-            client_part = client_part.strip(' -:').strip()
-            if client_part:
-                logger.info(f"Extracted client name from subject '{subject}': '{client_part}'")
-                return client_part
-    
-    # Fallback pattern: "{Client Name} Daily Sales Orders"
-    if 'Daily Sales Orders' in subject:
-        parts = subject.split('Daily Sales Orders', 1)
-        if len(parts) > 0:
-            client_part = parts[0].strip()
-            # Remove common prefixes
-            for prefix in ['Scheduled Report', 'Report', 'Orders']:
-                if client_part.startswith(prefix):
-                    client_part = client_part[len(prefix):].strip()
-                    if client_part.startswith('-') or client_part.startswith(':'):
-                        client_part = client_part[1:].strip()
-            if client_part:
-                return client_part
+    match = _SUBJECT_ARROW_RE.search(subject)
+    if match:
+        # Clean up any leading/trailing whitespace or dashes
+        client_part = match.group(1).strip().strip(' -:').strip()
+        if client_part:
+            logger.info(f"Extracted client name from subject '{subject}': '{client_part}'")
+            return client_part
+    
+    # Fallback pattern: "{Client Name} Daily Sales Orders", minus common prefixes
+    match = _SUBJECT_DAILY_RE.match(subject)
+    if match:
+        client_part = match.group(1).strip()
+        if client_part:
+            return client_part
     
     # Fallback: "Orders - {Client Name}"
-    if 'Orders' in subject and '-' in subject:
-        parts = subject.split('-', 1)
-        if len(parts) == 2:
-            client_part = parts[1].strip()
-            if client_part:
-                return client_part
+    match = _SUBJECT_DASH_RE.search(subject)
+    if match:
+        client_part = match.group(1).strip()
+        if client_part:
+            return client_part
     
     return None
 
 
-def lookup_client_by_name(client_name: str) -> Optional[uuid.UUID]:
-    """
-    Lookup client by name in voyager.client or voyager.client_erp_credentials.
-    
-    Args:
-        client_name: Client name to search for
-        
-    Returns:
-        client_erp_credentials_id (UUID) or None if not found
-    """
-    if not client_name:
+def _is_csv_attachment(att: Dict) -> bool:
+    """Whether an email attachment looks like a CSV (by filename, extension or MIME type)."""
+    filename = att.get('filename') or att.get('name') or ''
+    if filename.lower().endswith('.csv'):
+        return True
+    ext = att.get('extension') or att.get('file_extension') or ''
+    if ext.lower() == 'csv':
+        return True
+    mime = att.get('sub_type') or att.get('content_type') or ''
+    # Drop parameters such as "; charset=utf-8"
+    return mime.split(';', 1)[0].strip().lower() in _CSV_MIME_TYPES
+
+
+def _normalized_csv_payload(subject: str, attachments: List[Dict]) -> Optional[Dict]:
+    """Build the normalized payload from the first CSV attachment, or None if there isn't one."""
+    csv_attachment = next((att for att in attachments if _is_csv_attachment(att)), None)
+    if not csv_attachment:
         return None
-    
-    client_name = client_name.strip()
-    
-    # Search in voyager.client.name first
-    query = text("""
-        SELECT 
-            cec.id as credential_id,
-            c.name as client_name
-        FROM voyager.client c
-        INNER JOIN voyager.client_erp_credentials cec ON cec.client_id = c.id
-        WHERE cec.erp = 'cin7_core'
-        AND LOWER(TRIM(c.name)) = LOWER(TRIM(:client_name))
-        AND cec.cin7_api_auth_accountid IS NOT NULL
-        AND cec.cin7_api_auth_applicationkey IS NOT NULL
-        LIMIT 1
-    """)
-    
-    result = db.session.execute(query, {'client_name': client_name})
-    row = result.fetchone()
-    
-    if row:
-        return row.credential_id
-    
-    # Fallback to voyager.client_erp_credentials.connection_name
-    query = text("""
-        SELECT 
-            cec.id as credential_id,
-            cec.connection_name
-        FROM voyager.client_erp_credentials cec
-        WHERE cec.erp = 'cin7_core'
-        AND LOWER(TRIM(cec.connection_name)) = LOWER(TRIM(:client_name))
-        AND cec.cin7_api_auth_accountid IS NOT NULL
-        AND cec.cin7_api_auth_applicationkey IS NOT NULL
-        LIMIT 1
-    """)
-    
-    result = db.session.execute(query, {'client_name': client_name})
-    row = result.fetchone()
-    
-    if row:
-        return row.credential_id
-    
-    return None
+    return {
+        'subject': subject,
+        'attachments': [{
+            'url': csv_attachment.get('url') or csv_attachment.get('download_url') or csv_attachment.get('signed_url'),
+            'filename': csv_attachment.get('filename') or csv_attachment.get('name', 'attachment.csv')
+        }]
+    }
 
 
 def normalize_webhook_payload(payload: Dict, request_obj) -> Optional[Dict]:
@@ -154,53 +195,16 @@ def normalize_webhook_payload(payload: Dict, request_obj) -> Optional[Dict]:
     if 'latest_message' in payload:
         latest_message = payload.get('latest_message', {})
         subject = latest_message.get('subject') or payload.get('subject', '')
-        attachments = latest_message.get('attachments', [])
-        
-        # Find CSV attachment
-        csv_attachment = None
-        for att in attachments:
-            # Check various ways CSV might be identified
-            ext = att.get('extension', '').lower() or att.get('file_extension', '').lower()
-            sub_type = att.get('sub_type', '').lower() or att.get('content_type', '').lower()
-            filename = att.get('filename', '').lower() or att.get('name', '').lower()
-            
-            if ext == 'csv' or sub_type == 'csv' or 'csv' in sub_type or filename.endswith('.csv'):
-                csv_attachment = att
-                break
-        
-        if csv_attachment and subject:
-            return {
-                'subject': subject,
-                'attachments': [{
-                    'url': csv_attachment.get('url') or csv_attachment.get('download_url') or csv_attachment.get('signed_url'),
-                    'filename': csv_attachment.get('filename') or csv_attachment.get('name', 'attachment.csv')
-                }]
-            }
+        if subject:
+            normalized = _normalized_csv_payload(subject, latest_message.get('attachments', []))
+            if normalized:
+                return normalized
     
     # Format 2: Direct subject and attachments at root level
     if 'subject' in payload:
-        subject = payload.get('subject', '')
-        attachments = payload.get('attachments', [])
-        
-        # Find CSV attachment
-        csv_attachment = None
-        for att in attachments:
-            ext = att.get('extension', '').lower() or att.get('file_extension', '').lower()
-            sub_type = att.get('sub_type', '').lower() or att.get('content_type', '').lower()
-            filename = att.get('filename', '').lower() or att.get('name', '').lower()
-            
-            if ext == 'csv' or sub_type == 'csv' or 'csv' in sub_type or filename.endswith('.csv'):
-                csv_attachment = att
-                break
-        
-        if csv_attachment:
-            return {
-                'subject': subject,
-                'attachments': [{
-                    'url': csv_attachment.get('url') or csv_attachment.get('download_url') or csv_attachment.get('signed_url'),
-                    'filename': csv_attachment.get('filename') or csv_attachment.get('name', 'attachment.csv')
-                }]
-            }
+        normalized = _normalized_csv_payload(payload.get('subject', ''), payload.get('attachments', []))
+        if normalized:
+            return normalized
     
     # Future: Add other formats here (Mailgun, SendGrid, etc.)
     
@@ -211,6 +215,10 @@ def download_csv_from_url(url: str) -> Tuple[Optional[bytes], Optional[str]]:
     """
     Download CSV file from signed attachment URL.
     
+    The body is streamed in chunks so an oversized attachment (over
+    MAX_CSV_DOWNLOAD_BYTES) is rejected as soon as it is detected instead of
+    after it has been read into memory in full.
+    
     Args:
         url: Signed URL to download CSV from
         
@@ -220,10 +228,23 @@ def download_csv_from_url(url: str) -> Tuple[Optional[bytes], Optional[str]]:
     if not url:
         return None, "No URL provided"
     
+    too_large = f"CSV attachment exceeds the {MAX_CSV_DOWNLOAD_BYTES} byte limit"
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        return response.content, None
+        with _download_session.get(url, timeout=(5, 30), stream=True) as response:
+            response.raise_for_status()
+            
+            content_length = response.headers.get('Content-Length')
+            if content_length and content_length.isdigit() and int(content_length) > MAX_CSV_DOWNLOAD_BYTES:
+                return None, too_large
+            
+            chunks = []
+            received = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                received += len(chunk)
+                if received > MAX_CSV_DOWNLOAD_BYTES:
+                    return None, too_large
+                chunks.append(chunk)
+            return b''.join(chunks), None
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to download CSV from URL: {str(e)}")
         return None, f"Failed to download CSV: {str(e)}"
@@ -259,15 +280,44 @@ def extract_csv_from_payload(normalized_payload: Dict) -> Tuple[Optional[bytes],
     if error:
         return None, None, error
     
-    # Validate it's a CSV (basic check)
-    if not filename.lower().endswith('.csv'):
-        # Check content type or first few bytes
-        if csv_content and not csv_content.startswith(b'\xef\xbb\xbf') and b',' not in csv_content[:100]:
-            return None, None, "File does not appear to be a CSV"
+    # Validate it's a CSV (basic check) - trust a .csv name, otherwise look for a BOM or a comma up front
+    if filename.lower().endswith('.csv'):
+        return csv_content, filename, None
+    if csv_content and not csv_content.startswith(b'\xef\xbb\xbf') and csv_content.find(b',', 0, 100) == -1:
+        return None, None, "File does not appear to be a CSV"
     
     return csv_content, filename, None
 
 
+def _response_item(response: Any) -> Optional[Dict]:
+    """Return the object from a Cin7 create response (a dict, or a list whose first item is a dict)."""
+    if isinstance(response, dict):
+        return response
+    if isinstance(response, list) and response and isinstance(response[0], dict):
+        return response[0]
+    return None
+
+
+def _extract_id(response: Any) -> Optional[str]:
+    """Return the 'ID' from a Cin7 create response."""
+    item = _response_item(response)
+    return item.get('ID') if item is not None else None
+
+
+def _response_for_display(response: Any) -> Any:
+    """
+    Return a Cin7 response as stored for display.
+    
+    Prefers the raw JSON text the API client keeps in '_raw_json_text' (it
+    preserves Cin7's key order), then the parsed object, then the response as-is.
+    """
+    item = _response_item(response)
+    if item is None:
+        return response
+    return item.get('_raw_json_text') or item
+
+
+@lru_cache(maxsize=512)
 def categorize_error(error_message: str) -> str:
     """
     Categorize error message into error types for filtering.
@@ -277,20 +327,39 @@ def categorize_error(error_message: str) -> str:
         
     Returns:
         Error type string: "customer_not_found", "missing_fields", "api_error", or "validation_error"
+    
+    Pure function of the message, and the same Cin7 errors repeat across the
+    orders of an upload, so results are memoized.
     """
     if not error_message:
         return "validation_error"
     
-    error_lower = error_message.lower()
-    
-    if "customer" in error_lower and ("not found" in error_lower or "notfound" in error_lower):
+    # Checked in priority order - a customer lookup failure wins even if the message also mentions missing fields
+    if _ERROR_CUSTOMER_RE.search(error_message) and _ERROR_NOT_FOUND_RE.search(error_message):
         return "customer_not_found"
-    elif "required" in error_lower or "missing" in error_lower:
+    if _ERROR_MISSING_RE.search(error_message):
         return "missing_fields"
-    elif "404" in error_message or "400" in error_message or "api" in error_lower:
+    if _ERROR_API_RE.search(error_message):
         return "api_error"
-    else:
-        return "validation_error"
+    return "validation_error"
+
+
+def _first_value(row: Dict, *keys: str, default: Any = '') -> Any:
+    """Return the first truthy value in row among keys, or default."""
+    for key in keys:
+        value = row.get(key)
+        if value:
+            return value
+    return default
+
+
+def _order_data_projection(column_mapping: Mapping[str, str]) -> Tuple[Tuple[str, str], ...]:
+    """(clean field name, CSV column) for every mapped field - clean names drop spaces/case."""
+    return tuple(
+        (cin7_field.lower().replace(' ', '_'), csv_column)
+        for cin7_field, csv_column in column_mapping.items()
+        if csv_column
+    )
 
 
 def process_single_order(
@@ -303,7 +372,8 @@ def process_single_order(
     api_client: Cin7SalesAPI,
     builder: SalesOrderBuilder,
     credential_id_for_logging: uuid.UUID,
-    existing_order_result: Optional[SalesOrderResult] = None
+    existing_order_result: Optional[SalesOrderResult] = None,
+    projection: Optional[Tuple[Tuple[str, str], ...]] = None
 ) -> Dict:
     """
     Process a single order (create Sale and Sale Order in Cin7).
@@ -319,16 +389,18 @@ def process_single_order(
         builder: SalesOrderBuilder instance
         credential_id_for_logging: Credential ID for API logging
         existing_order_result: Optional existing SalesOrderResult to update (for retries)
+        projection: Precomputed _order_data_projection(column_mapping), for batches
         
     Returns:
         Result dict with status, sale_id, sale_order_id, error_message, order_data
     """
-    # Use existing order_result if provided (for retries), otherwise create new one
+    # Use existing order_result if provided (for retries - already claimed as 'processing'), otherwise create new one
     if existing_order_result:
         order_result = existing_order_result
-        order_result.status = 'processing'
     else:
-        # Create order result record with status='processing'
+        # New results are only added to the session once they reach a final status,
+        # so each order is written with a single INSERT (the upload row already shows
+        # the batch as processing)
         order_result = SalesOrderResult(
             id=uuid.uuid4(),
             upload_id=upload_id,
@@ -337,44 +409,63 @@ def process_single_order(
             status='processing',
             created_at=datetime.utcnow()
         )
-        db.session.add(order_result)
-    db.session.commit()
     
     # Extract order data snapshot - include all mapped columns from all rows
     primary_row = order_rows[0] if order_rows else {}
     
-    # Build comprehensive order_data with all mapped fields
-    order_data = {}
-    
-    # Add all mapped columns from primary row
-    for cin7_field, csv_column in column_mapping.items():
-        if csv_column and csv_column in primary_row:
-            value = primary_row[csv_column]
-            # Use a clean field name (remove spaces, special chars)
-            clean_field = cin7_field.lower().replace(' ', '_')
-            order_data[clean_field] = value
-    
-    # Also include row data for all rows in this order
-    order_data['all_rows'] = []
-    for row in order_rows:
-        row_data = {}
-        for cin7_field, csv_column in column_mapping.items():
-            if csv_column and csv_column in row:
-                row_data[csv_column] = row[csv_column]
-        order_data['all_rows'].append(row_data)
-    
-    # Keep backward compatibility with old field names
-    order_data['customer_name'] = primary_row.get('CustomerName') or primary_row.get('customer_name', '') or order_data.get('customername', '')
-    order_data['po_number'] = primary_row.get('CustomerReference') or primary_row.get('po_number', '') or order_data.get('customerreference', '')
-    order_data['order_date'] = primary_row.get('SaleDate') or primary_row.get('order_date', '') or order_data.get('saledate', '')
-    order_data['order_number'] = primary_row.get('SaleOrderNumber') or primary_row.get('order_number', '') or order_data.get('saleordernumber', '')
+    if projection is None:
+        projection = _order_data_projection(column_mapping)
+    
+    # Build comprehensive order_data with all mapped fields from the primary row
+    order_data = {
+        clean_field: primary_row[csv_column]
+        for clean_field, csv_column in projection
+        if csv_column in primary_row
+    }
+    
+    # Per-row copies of every mapped column - nothing reads them back, so only kept when asked for
+    if STORE_ROW_DETAILS:
+        order_data['all_rows'] = [
+            {csv_column: row[csv_column] for _, csv_column in projection if csv_column in row}
+            for row in order_rows
+        ]
+    
+    # Keep backward compatibility with old field names (CSV header, then snake_case key, then mapped field)
+    customer_name = _first_value(primary_row, 'CustomerName', 'customer_name')
+    order_data['customer_name'] = customer_name or order_data.get('customername', '')
+    order_data['po_number'] = _first_value(primary_row, 'CustomerReference', 'po_number') or order_data.get('customerreference', '')
+    order_data['order_date'] = _first_value(primary_row, 'SaleDate', 'order_date') or order_data.get('saledate', '')
+    order_data['order_number'] = _first_value(primary_row, 'SaleOrderNumber', 'order_number') or order_data.get('saleordernumber', '')
+    
+    def _fail(error_message: str, details: Optional[Dict] = None, sale_id=None, error_type_source: Optional[str] = None) -> Dict:
+        """Record this order as failed, commit, and build the result dict."""
+        order_result.status = 'failed'
+        order_result.error_message = error_message
+        # error_type_source lets callers categorize without IDs in the message skewing the match
+        order_result.error_type = categorize_error(error_type_source or error_message)
+        if sale_id:
+            order_result.sale_id = sale_id  # Keep the Sale ID even though the order failed
+        order_result.order_data = {**order_data, **details} if details else order_data
+        order_result.processed_at = func.now()
+        db.session.add(order_result)
+        db.session.commit()
+        
+        result = {
+            'status': 'failed',
+            'error_message': error_message,
+            'order_data': order_result.order_data
+        }
+        if details and 'matching_details' in details:
+            result['matching_details'] = details['matching_details']
+        if sale_id:
+            result['sale_id'] = str(sale_id)
+        return result
     
     try:
         # Always use combined approach (single API call with nested Order)
         use_combined_approach = True
         
         # Check customer lookup first (needed for TaxRule in combined call)
-        customer_name = primary_row.get('CustomerName') or primary_row.get('customer_name') or ''
         customer_data = None
         
         # Collect detailed matching information before API call
@@ -414,26 +505,24 @@ def process_single_order(
         else:
             sale_type_value = 'Simple Sale'
         
-        # Check product lookups for all rows
+        # Check product lookups - once per distinct SKU, in line order
         sku_col = column_mapping.get('SKU') or column_mapping.get('ProductCode')
         if sku_col:
-            for row in order_rows:
-                sku = row.get(sku_col, '')
-                if sku:
-                    product = builder._lookup_product_by_sku(sku)
-                    if product:
-                        matching_details['products'].append({
-                            'sku': sku,
-                            'found': True,
-                            'cin7_id': product.get('ID'),
-                            'cin7_name': product.get('Name')
-                        })
-                    else:
-                        matching_details['products'].append({
-                            'sku': sku,
-                            'found': False,
-                            'error': f'Product SKU "{sku}" not found in Cin7'
-                        })
+            for sku in dict.fromkeys(row[sku_col] for row in order_rows if row.get(sku_col)):
+                product = builder._lookup_product_by_sku(sku)
+                if product:
+                    matching_details['products'].append({
+                        'sku': sku,
+                        'found': True,
+                        'cin7_id': product.get('ID'),
+                        'cin7_name': product.get('Name')
+                    })
+                else:
+                    matching_details['products'].append({
+                        'sku': sku,
+                        'found': False,
+                        'error': f'Product SKU "{sku}" not found in Cin7'
+                    })
         
         # Check for missing required fields and build "what's needed" payload
         required_fields = ['CustomerID', 'Customer', 'Type']
@@ -455,7 +544,6 @@ def process_single_order(
                 what_is_needed['CustomerID'] = '<REQUIRED: Customer ID from Cin7>'
         
         if 'Customer' in missing_required:
-            customer_name = primary_row.get('CustomerName') or primary_row.get('customer_name') or ''
             if customer_name:
                 what_is_needed['Customer'] = customer_name
             else:
@@ -474,8 +562,12 @@ def process_single_order(
         
         # Debug: Log if lines are empty
         if sale_order_for_what_is_needed and (not sale_order_for_what_is_needed.get('Lines') or len(sale_order_for_what_is_needed.get('Lines', [])) == 0):
-            logger.warning(f"Warning: Sale Order payload has no lines for order {order_key}. Column mapping has SKU: {'SKU' in column_mapping}, Price: {'Price' in column_mapping}, Quantity: {'Quantity' in column_mapping}")
-            logger.warning(f"Primary row keys: {list(primary_row.keys())[:10]}...")  # Log first 10 keys
+            logger.warning(
+                "Sale Order payload has no lines for order %s. Column mapping has SKU: %s, Price: %s, Quantity: %s",
+                order_key, 'SKU' in column_mapping, 'Price' in column_mapping, 'Quantity' in column_mapping
+            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Primary row keys: %s...", list(primary_row.keys())[:10])  # Log first 10 keys
         
         # Add notes about what needs to be fixed
         what_is_needed['_notes'] = []
@@ -500,62 +592,22 @@ def process_single_order(
             if not matching_details['customer'].get('found'):
                 enhanced_error += f" | Customer '{matching_details['customer'].get('name', 'N/A')}' not found in Cin7"
             
-            order_result.status = 'failed'
-            order_result.error_message = enhanced_error
-            order_result.error_type = categorize_error(enhanced_error)
-            order_result.order_data = {
-                **order_data,
+            return _fail(enhanced_error, {
                 'matching_details': matching_details,
                 'sale_payload': sale_data,  # Store what we would have sent (sale payload)
                 'sale_order_payload': sale_order_for_what_is_needed,  # Store what we would have sent (sale order payload)
                 'what_is_needed': what_is_needed,  # Store what's needed
                 'attempted_send': False  # Flag to indicate we didn't actually send
-            }
-            order_result.processed_at = datetime.utcnow()
-            db.session.commit()
-            return {
-                'status': 'failed',
-                'error_message': enhanced_error,
-                'order_data': order_result.order_data,
-                'matching_details': matching_details
-            }
+            })
         
         # Step 1: Create Sale first
-        logger.info(f"Creating Sale for order {order_key}...")
+        logger.debug("Creating Sale for order %s...", order_key)
         sale_success, sale_message, sale_response = api_client.create_sale(sale_data)
-        sale_id = None
-        sale_data_from_response = None
-        sale_api_response = None
-        
-        # Extract Sale ID, full Sale object, and raw JSON text from response
-        if isinstance(sale_response, dict):
-            sale_id = sale_response.get('ID')
-            sale_data_from_response = sale_response.copy() if sale_response else None  # Copy for TaxRule lookup
-            # Extract raw JSON text if available (preserves exact order)
-            sale_api_response_raw = sale_response.get('_raw_json_text')
-            if sale_api_response_raw:
-                # Use raw JSON text to preserve exact order
-                sale_api_response = sale_api_response_raw
-                # Remove _raw_json_text from the copy used for TaxRule lookup
-                if sale_data_from_response and '_raw_json_text' in sale_data_from_response:
-                    del sale_data_from_response['_raw_json_text']
-            else:
-                # No raw text available, use parsed dict
-                sale_api_response = sale_response
-        elif isinstance(sale_response, list) and len(sale_response) > 0:
-            first_item = sale_response[0] if isinstance(sale_response[0], dict) else None
-            if first_item:
-                sale_id = first_item.get('ID')
-                sale_data_from_response = first_item.copy() if first_item else None  # Copy for TaxRule lookup
-                # Extract raw JSON text if available
-                sale_api_response_raw = first_item.get('_raw_json_text')
-                if sale_api_response_raw:
-                    sale_api_response = sale_api_response_raw
-                    # Remove _raw_json_text from the copy used for TaxRule lookup
-                    if sale_data_from_response and '_raw_json_text' in sale_data_from_response:
-                        del sale_data_from_response['_raw_json_text']
-                else:
-                    sale_api_response = first_item
+        sale_id = _extract_id(sale_response)
+        sale_api_response = _response_for_display(sale_response)
+        # Full Sale object (without the raw text) for the TaxRule lookup when building the Sale Order
+        sale_item = _response_item(sale_response)
+        sale_data_from_response = {k: v for k, v in sale_item.items() if k != '_raw_json_text'} if sale_item else None
         
         if not sale_success:
             # Enhance error message with matching details
@@ -574,125 +626,76 @@ def process_single_order(
             
             enhanced_error = ' | '.join(error_parts)
             
-            order_result.status = 'failed'
-            order_result.error_message = enhanced_error
-            order_result.error_type = categorize_error(enhanced_error)
-            order_result.order_data = {
-                **order_data,
+            return _fail(enhanced_error, {
                 'matching_details': matching_details,
                 'sale_payload': sale_data,
                 'sale_api_response': sale_api_response,
                 'what_is_needed': what_is_needed,
                 'attempted_send': True
-            }
-            order_result.processed_at = datetime.utcnow()
-            db.session.commit()
-            return {
-                'status': 'failed',
-                'error_message': enhanced_error,
-                'order_data': order_result.order_data,
-                'matching_details': matching_details
-            }
+            })
         
         if not sale_id:
-            order_result.status = 'failed'
-            order_result.error_message = 'Sale created but no Sale ID returned'
-            order_result.error_type = categorize_error('Sale created but no Sale ID returned')
-            order_result.order_data = {
-                **order_data,
+            return _fail('Sale created but no Sale ID returned', {
                 'matching_details': matching_details,
                 'sale_payload': sale_data,
                 'sale_api_response': sale_api_response,
                 'what_is_needed': what_is_needed,
                 'attempted_send': True
-            }
-            order_result.processed_at = datetime.utcnow()
-            db.session.commit()
-            return {
-                'status': 'failed',
-                'error_message': 'Sale created but no Sale ID returned',
-                'order_data': order_result.order_data
-            }
+            })
         
         # Step 2: Build and create Sale Order with the Sale ID
-        logger.info(f"Creating Sale Order for order {order_key} with Sale ID {sale_id}...")
+        logger.debug("Creating Sale Order for order %s with Sale ID %s...", order_key, sale_id)
         
         # Build sale order payload
-        # Use sale_data_from_response (from create_sale response) for TaxRule lookup
-        if len(order_rows) > 1:
+        # Use sale_data_from_response (from create_sale response) for TaxRule lookup.
+        # The preview payload built above only lacks the Sale ID unless the sale's
+        # TaxRule changes what the lines get, so reuse it instead of rebuilding
+        if sale_order_for_what_is_needed and builder.tax_rule_for(customer_data) == builder.tax_rule_for(customer_data, sale_data_from_response):
+            sale_order_data = {**sale_order_for_what_is_needed, 'SaleID': str(sale_id)}
+        elif len(order_rows) > 1:
             sale_order_data = builder.build_sale_order_from_rows(order_rows, column_mapping, str(sale_id), customer_data=customer_data, sale_data=sale_data_from_response)
         else:
             sale_order_data = builder.build_sale_order(order_rows[0], column_mapping, str(sale_id), customer_data=customer_data, sale_data=sale_data_from_response)
         
         # Create Sale Order via API
         so_success, so_message, so_response = api_client.create_sale_order(sale_order_data)
-        sale_order_api_response = None
-        
-        # Extract raw JSON text if available to preserve exact order
-        if isinstance(so_response, dict):
-            sale_order_api_response_raw = so_response.get('_raw_json_text')
-            if sale_order_api_response_raw:
-                sale_order_api_response = sale_order_api_response_raw
-            else:
-                sale_order_api_response = so_response
-        elif isinstance(so_response, list) and len(so_response) > 0:
-            first_item = so_response[0] if isinstance(so_response[0], dict) else None
-            if first_item:
-                sale_order_api_response_raw = first_item.get('_raw_json_text')
-                if sale_order_api_response_raw:
-                    sale_order_api_response = sale_order_api_response_raw
-                else:
-                    sale_order_api_response = first_item
-        else:
-            sale_order_api_response = so_response
-        sale_order_id = None
-        
-        # Extract Sale Order ID from response
-        if isinstance(so_response, dict):
-            sale_order_id = so_response.get('ID')
-        elif isinstance(so_response, list) and len(so_response) > 0:
-            first_item = so_response[0] if isinstance(so_response[0], dict) else None
-            if first_item:
-                sale_order_id = first_item.get('ID')
+        sale_order_api_response = _response_for_display(so_response)
+        sale_order_id = _extract_id(so_response)
         
         if not so_success:
             # Sale was created but Sale Order failed
-            order_result.status = 'failed'
-            order_result.error_message = f'Sale created (ID: {sale_id}) but Sale Order failed: {so_message}'
-            order_result.error_type = categorize_error(f'Sale created but Sale Order failed: {so_message}')
-            order_result.sale_id = sale_id  # Store the sale ID even though order failed
-            order_result.order_data = {
-                **order_data,
-                'matching_details': matching_details,
-                'sale_payload': sale_data,
-                'sale_order_payload': sale_order_data,
-                'sale_api_response': sale_api_response,
-                'sale_order_api_response': sale_order_api_response,
-                'what_is_needed': what_is_needed,
-                'attempted_send': True
-            }
-            order_result.processed_at = datetime.utcnow()
-            db.session.commit()
-            return {
-                'status': 'failed',
-                'error_message': f'Sale created (ID: {sale_id}) but Sale Order failed: {so_message}',
-                'order_data': order_result.order_data,
-                'matching_details': matching_details
-            }
+            return _fail(
+                f'Sale created (ID: {sale_id}) but Sale Order failed: {so_message}',
+                {
+                    'matching_details': matching_details,
+                    'sale_payload': sale_data,
+                    'sale_order_payload': sale_order_data,
+                    'sale_api_response': sale_api_response,
+                    'sale_order_api_response': sale_order_api_response,
+                    'what_is_needed': what_is_needed,
+                    'attempted_send': True
+                },
+                sale_id=sale_id,
+                error_type_source=f'Sale created but Sale Order failed: {so_message}'
+            )
         
         # Success - both Sale and Sale Order were created
         order_result.status = 'success'
         order_result.sale_id = sale_id
         order_result.sale_order_id = sale_order_id if sale_order_id else None
+        # The payloads feed the order detail view; the API responses only echo the
+        # created Sale back and are already in the order's Cin7 API logs
         order_result.order_data = {
             **order_data,
             'matching_details': matching_details,
             'sale_payload': sale_data,
-            'sale_order_payload': sale_order_data,
-            'sale_api_response': sale_api_response,
-            'sale_order_api_response': sale_order_api_response
+            'sale_order_payload': sale_order_data
         }
-        order_result.processed_at = datetime.utcnow()
+        if STORE_SUCCESS_API_RESPONSES:
+            order_result.order_data['sale_api_response'] = sale_api_response
+            order_result.order_data['sale_order_api_response'] = sale_order_api_response
+        order_result.processed_at = func.now()
+        db.session.add(order_result)
         db.session.commit()
         
         return {
@@ -702,132 +705,11 @@ def process_single_order(
             'order_data': order_result.order_data
         }
     
-    except Exception as e:
-            if not sale_id:
-                order_result.status = 'failed'
-                order_result.error_message = 'Sale created but no ID returned'
-                order_result.error_type = categorize_error('Sale created but no ID returned')
-                order_result.order_data = order_data
-                order_result.processed_at = datetime.utcnow()
-                db.session.commit()
-                return {
-                    'status': 'failed',
-                    'error_message': 'Sale created but no ID returned',
-                    'order_data': order_data
-                }
-            
-            # Rate limiting delay between Sale and Sale Order
-            delay = settings.get('default_delay_between_orders', 0.7)
-            time.sleep(delay)
-            
-            # Step 2: Build and create Sale Order
-            # Note: sale_order_data was already built above for "what_is_needed", but rebuild with actual sale_id
-            # TaxRule comes from customer_data or settings - no need to GET the Sale
-            logger.info(f"Step 2: Building Sale Order for order {order_key} with sale_id {sale_id}")
-            row_data_list = order_rows
-            sale_order_data = builder.build_sale_order_from_rows(row_data_list, column_mapping, str(sale_id), customer_data=customer_data)
-            
-            logger.info(f"Sale Order payload built for order {order_key}: SaleID={sale_order_data.get('SaleID')}, Lines count={len(sale_order_data.get('Lines', []))}, Total={sale_order_data.get('Total')}")
-            
-            # Create Sale Order via API
-            logger.info(f"Creating Sale Order via API for order {order_key}...")
-            so_success, so_message, so_response = api_client.create_sale_order(sale_order_data)
-            logger.info(f"Sale Order API call result for order {order_key}: success={so_success}, message={so_message}")
-            logger.info(f"Sale Order response type: {type(so_response)}, response: {so_response}")
-            
-            # Store API responses for display - use raw JSON text if available to preserve exact order
-            sale_order_api_response = None
-            if isinstance(so_response, dict):
-                sale_order_api_response_raw = so_response.get('_raw_json_text')
-                if sale_order_api_response_raw:
-                    sale_order_api_response = sale_order_api_response_raw
-                else:
-                    sale_order_api_response = so_response
-            elif isinstance(so_response, list) and len(so_response) > 0:
-                first_item = so_response[0] if isinstance(so_response[0], dict) else None
-                if first_item:
-                    sale_order_api_response_raw = first_item.get('_raw_json_text')
-                    if sale_order_api_response_raw:
-                        sale_order_api_response = sale_order_api_response_raw
-                    else:
-                        sale_order_api_response = first_item
-            else:
-                sale_order_api_response = so_response if so_response else None
-            
-            if so_success:
-                sale_order_id = None
-                if isinstance(so_response, dict):
-                    # Try multiple possible ID fields
-                    sale_order_id = (so_response.get('ID') or 
-                                   so_response.get('SaleOrderID') or 
-                                   so_response.get('SaleOrder') or
-                                   so_response.get('id'))
-                    logger.info(f"Extracted sale_order_id from dict: {sale_order_id}, response keys: {list(so_response.keys()) if isinstance(so_response, dict) else 'N/A'}")
-                elif isinstance(so_response, list) and len(so_response) > 0:
-                    first_item = so_response[0]
-                    if isinstance(first_item, dict):
-                        sale_order_id = (first_item.get('ID') or 
-                                       first_item.get('SaleOrderID') or 
-                                       first_item.get('SaleOrder') or
-                                       first_item.get('id'))
-                    logger.info(f"Extracted sale_order_id from list: {sale_order_id}")
-                
-                # If we still don't have an ID, log warning but don't fail - Sale Order might have been created
-                if not sale_order_id:
-                    logger.warning(f"Sale Order created successfully but no ID found in response for order {order_key}. Response: {so_response}")
-                    # Still mark as success since the API call succeeded - the Sale Order was likely created
-                    # The ID might be in the response but in an unexpected format
-                
-                order_result.status = 'success'
-                order_result.sale_id = sale_id
-                order_result.sale_order_id = sale_order_id if sale_order_id else None
-                # Store sale_payload and API responses for successful orders too (for reference)
-                order_result.order_data = {
-                    **order_data,
-                    'matching_details': matching_details,
-                    'sale_payload': sale_data,  # Store the payload that was sent
-                    'sale_api_response': sale_api_response,  # Store the API response
-                    'sale_order_payload': sale_order_data,  # Store the sale order payload that was sent
-                    'sale_order_api_response': sale_order_api_response  # Store the API response
-                }
-                order_result.processed_at = datetime.utcnow()
-                db.session.commit()
-                
-                return {
-                    'status': 'success',
-                    'sale_id': str(sale_id),
-                    'sale_order_id': str(sale_order_id) if sale_order_id else None,
-                    'order_data': order_result.order_data
-                }
-            else:
-                # Sale was created but Sale Order failed
-                error_msg = f'Sale created (ID: {sale_id}) but Sale Order failed: {so_message}'
-            order_result.status = 'failed'
-            order_result.sale_id = sale_id
-            order_result.error_message = error_msg
-            order_result.error_type = categorize_error(error_msg)
-            # Store sale_payload, sale_order_payload, API responses and matching details for reference
-            order_result.order_data = {
-                **order_data,
-                'matching_details': matching_details,
-                'sale_payload': sale_data,  # Store the payload that was sent
-                'sale_api_response': sale_api_response,  # Store the API response
-                'sale_order_payload': sale_order_data,  # Store the sale order payload that was sent
-                'sale_order_api_response': sale_order_api_response  # Store the API response (even if failed)
-            }
-            order_result.processed_at = datetime.utcnow()
-            db.session.commit()
-            
-            return {
-                'status': 'failed',
-                'sale_id': str(sale_id),
-                'error_message': f'Sale created (ID: {sale_id}) but Sale Order failed: {so_message}',
-                'order_data': order_result.order_data
-            }
-    
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"Error processing order {order_key}: {error_msg}", exc_info=True)
+        # Most failures here are expected (Cin7 rejections, bad CSV data) - keep the
+        # traceback out of the steady-state logs and only walk it when debugging
+        logger.error("Error processing order %s: %s", order_key, error_msg, exc_info=logger.isEnabledFor(logging.DEBUG))
         
         # Improve error message for common issues
         if "'NoneType' object has no attribute 'strip'" in error_msg:
@@ -835,18 +717,14 @@ def process_single_order(
         elif "No column mapping" in error_msg:
             error_msg = "Column mappings not configured. Please set up CSV column mappings in the Mappings page for this client."
         
-        order_result.status = 'failed'
-        order_result.error_message = error_msg
-        order_result.error_type = categorize_error(error_msg)
-        order_result.order_data = order_data
-        order_result.processed_at = datetime.utcnow()
-        db.session.commit()
-        
-        return {
-            'status': 'failed',
-            'error_message': error_msg,
-            'order_data': order_data
-        }
+        # The exception may have come from the database - start from a clean session
+        db.session.rollback()
+        try:
+            return _fail(error_msg)
+        except Exception as record_error:
+            logger.error(f"Error recording failure for order {order_key}: {str(record_error)}", exc_info=True)
+            db.session.rollback()
+            return {'status': 'failed', 'error_message': error_msg, 'order_data': order_data}
 
 
 def process_webhook_csv(
@@ -881,14 +759,7 @@ def process_webhook_csv(
     detected_mappings = parser.detect_columns(rows)
     
     # Get default mapping if available
-    default_mapping = {}
-    default_mapping_obj = ClientCsvMapping.query.filter_by(
-        client_erp_credentials_id=client_erp_credentials_id,
-        is_default=True
-    ).first()
-    
-    if default_mapping_obj:
-        default_mapping = default_mapping_obj.column_mapping or {}
+    default_mapping = load_default_column_mapping(str(client_erp_credentials_id)) or {}
     
     # Merge detected mappings with default mapping (default takes precedence)
     column_mapping = {}
@@ -909,124 +780,27 @@ def process_webhook_csv(
             'csv_columns': list(rows[0]['data'].keys()) if rows else []
         }
     
-    # Get credentials and settings
-    check_customer_cols_query = text("""
-        SELECT column_name 
-        FROM information_schema.columns 
-        WHERE table_schema = 'voyager' 
-        AND table_name = 'client_erp_credentials' 
-        AND column_name IN ('customer_account_receivable', 'customer_revenue_account', 'customer_tax_rule', 'customer_attribute_set')
-    """)
-    existing_customer_cols = {row[0] for row in db.session.execute(check_customer_cols_query).fetchall()}
-    
-    select_fields = [
-        'cec.id',
-        'cec.cin7_api_auth_accountid as account_id',
-        'cec.cin7_api_auth_applicationkey as application_key',
-        'cec.sale_type',
-        'cec.tax_rule',
-        'cec.default_status'
-    ]
-    
-    if 'customer_account_receivable' in existing_customer_cols:
-        select_fields.append('cec.customer_account_receivable')
-    else:
-        select_fields.append('NULL as customer_account_receivable')
-    
-    if 'customer_revenue_account' in existing_customer_cols:
-        select_fields.append('cec.customer_revenue_account')
-    else:
-        select_fields.append('NULL as customer_revenue_account')
-    
-    if 'customer_tax_rule' in existing_customer_cols:
-        select_fields.append('cec.customer_tax_rule')
-    else:
-        select_fields.append('NULL as customer_tax_rule')
+    # Shared read-only by every order worker; the order_data projection only depends on it
+    column_mapping = MappingProxyType(column_mapping)
+    projection = _order_data_projection(column_mapping)
     
-    if 'customer_attribute_set' in existing_customer_cols:
-        select_fields.append('cec.customer_attribute_set')
-    else:
-        select_fields.append('NULL as customer_attribute_set')
-    
-    query = text(f"""
-        SELECT 
-            {', '.join(select_fields)}
-        FROM voyager.client_erp_credentials cec
-        WHERE cec.erp = 'cin7_core'
-        AND cec.id = :cred_id
-    """)
-    result = db.session.execute(query, {'cred_id': client_erp_credentials_id})
-    cred_row = result.fetchone()
-    
-    if not cred_row or not cred_row.account_id or not cred_row.application_key:
+    # Get credentials and settings (cached per credential)
+    bundle = load_settings_bundle(str(client_erp_credentials_id))
+    if not bundle:
         return {'error': 'Cin7 credentials not configured'}
     
-    account_id = cred_row.account_id
-    application_key = cred_row.application_key
-    sale_type = cred_row.sale_type
-    tax_rule = cred_row.tax_rule
-    default_status = cred_row.default_status
-    
-    # Extract customer default fields
-    customer_account_receivable = None
-    customer_revenue_account = None
-    customer_tax_rule = None
-    customer_attribute_set = None
-    
-    if 'customer_account_receivable' in existing_customer_cols and hasattr(cred_row, 'customer_account_receivable'):
-        customer_account_receivable = cred_row.customer_account_receivable if cred_row.customer_account_receivable else None
-    if 'customer_revenue_account' in existing_customer_cols and hasattr(cred_row, 'customer_revenue_account'):
-        customer_revenue_account = cred_row.customer_revenue_account if cred_row.customer_revenue_account else None
-    if 'customer_tax_rule' in existing_customer_cols and hasattr(cred_row, 'customer_tax_rule'):
-        customer_tax_rule = str(cred_row.customer_tax_rule) if cred_row.customer_tax_rule else None
-    if 'customer_attribute_set' in existing_customer_cols and hasattr(cred_row, 'customer_attribute_set'):
-        customer_attribute_set = cred_row.customer_attribute_set
-    
-    # Get settings
-    client_query = text("""
-        SELECT client_id FROM voyager.client_erp_credentials
-        WHERE id = :cred_id
-    """)
-    client_result = db.session.execute(client_query, {'cred_id': client_erp_credentials_id})
-    client_row = client_result.fetchone()
-    
-    settings_obj = None
-    if client_row and client_row.client_id:
-        settings_obj = ClientSettings.query.filter_by(client_id=client_row.client_id).first()
-    
-    settings = {}
-    if settings_obj:
-        settings = {
-            'default_status': default_status or settings_obj.default_status,
-            'default_currency': settings_obj.default_currency,
-            'tax_inclusive': settings_obj.tax_inclusive,
-            'default_location': settings_obj.default_location,
-            'default_delay_between_orders': settings_obj.default_delay_between_orders,
-            'sale_type': sale_type,
-            'tax_rule': tax_rule,
-            'customer_account_receivable': customer_account_receivable,
-            'customer_revenue_account': customer_revenue_account,
-            'customer_tax_rule': customer_tax_rule,
-            'customer_attribute_set': customer_attribute_set
-        }
-    else:
-        settings = {
-            'default_status': default_status or 'DRAFT',
-            'default_currency': 'USD',
-            'tax_inclusive': False,
-            'default_location': None,
-            'default_delay_between_orders': 0.7,
-            'sale_type': sale_type,
-            'tax_rule': tax_rule,
-            'customer_account_receivable': customer_account_receivable,
-            'customer_revenue_account': customer_revenue_account,
-            'customer_tax_rule': customer_tax_rule,
-            'customer_attribute_set': customer_attribute_set
-        }
+    creds, cached_settings = bundle
+    account_id = creds['account_id']
+    application_key = creds['application_key']
+    # Copy so per-upload tweaks never leak back into the shared cache entry
+    settings = dict(cached_settings)
     
     # Create logging callback
     credential_id_for_logging = client_erp_credentials_id
     
+    # API calls are buffered and written in batches rather than committed one at a time
+    api_log_buffer = ApiLogBuffer()
+    
     def log_api_call(endpoint, method, request_url, request_headers, request_body,
                      response_status, response_body, error_message, duration_ms):
         """Callback to log API calls to database"""
@@ -1038,59 +812,31 @@ def process_webhook_csv(
             if isinstance(response_body, str):
                 raw_response_text = response_body
                 try:
-                    import json
                     parsed_response_body = json.loads(response_body)
                 except (json.JSONDecodeError, TypeError):
                     # If parsing fails, keep as string
                     parsed_response_body = response_body
             
-            try:
-                log_entry = Cin7ApiLog(
-                    id=uuid.uuid4(),
-                    client_id=credential_id_for_logging,
-                    user_id=None,  # Webhook has no user
-                    upload_id=upload_id,
-                    trigger='webhook',
-                    endpoint=endpoint,
-                    method=method,
-                    request_url=request_url,
-                    request_headers=request_headers,
-                    request_body=request_body,
-                    response_status=response_status,
-                    response_body=parsed_response_body,
-                    raw_response_body_text=raw_response_text,
-                    error_message=error_message,
-                    duration_ms=duration_ms
-                )
-                db.session.add(log_entry)
-                db.session.commit()
-            except Exception as trigger_error:
-                error_str = str(trigger_error).lower()
-                if 'trigger' in error_str or 'column' in error_str:
-                    db.session.rollback()
-                    log_entry = Cin7ApiLog(
-                        id=uuid.uuid4(),
-                        client_id=credential_id_for_logging,
-                        user_id=None,
-                        upload_id=upload_id,
-                        endpoint=endpoint,
-                        method=method,
-                        request_url=request_url,
-                        request_headers=request_headers,
-                        request_body=request_body,
-                        response_status=response_status,
-                        response_body=parsed_response_body,
-                        raw_response_body_text=raw_response_text,
-                        error_message=error_message,
-                        duration_ms=duration_ms
-                    )
-                    db.session.add(log_entry)
-                    db.session.commit()
-                else:
-                    raise
+            api_log_buffer.add({
+                'id': uuid.uuid4(),
+                'client_id': credential_id_for_logging,
+                'user_id': None,  # Webhook has no user
+                'upload_id': upload_id,
+                'trigger': 'webhook',
+                'endpoint': endpoint,
+                'method': method,
+                'request_url': request_url,
+                'request_headers': request_headers,
+                'request_body': request_body,
+                'response_status': response_status,
+                'response_body': parsed_response_body,
+                'raw_response_body_text': raw_response_text,
+                'error_message': error_message,
+                'duration_ms': duration_ms,
+                'created_at': datetime.utcnow()
+            })
         except Exception as e:
             logger.error(f"Error logging API call: {str(e)}")
-            db.session.rollback()
     
     # Initialize API client
     api_client = Cin7SalesAPI(
@@ -1115,44 +861,60 @@ def process_webhook_csv(
         logger.warning(f"Warning: Failed to preload customers/products: {str(e)}")
         # Continue anyway - will use API calls as fallback
     
-    # Initialize builder with preloaded data
-    builder = SalesOrderBuilder(
-        settings, 
-        api_client,
-        preloaded_customers=getattr(validator, 'customer_lookup', {}),
-        preloaded_products=getattr(validator, 'product_lookup', {})
-    )
+    # Builders keep per-build state, so each worker thread gets its own (sharing the preloaded data)
+    builders = threading.local()
+    
+    def get_builder() -> SalesOrderBuilder:
+        builder = getattr(builders, 'builder', None)
+        if builder is None:
+            builder = builders.builder = SalesOrderBuilder(
+                settings, 
+                api_client,
+                preloaded_customers=getattr(validator, 'customer_lookup', {}),
+                preloaded_products=getattr(validator, 'product_lookup', {})
+            )
+        return builder
+    
+    # Space order starts by the configured delay; time spent in the API calls counts towards it.
+    # The account's shared API limiter keeps the combined request rate within Cin7's per-second
+    # and per-minute limits, across uploads and retries in this process.
+    limiter = RateLimiter(settings.get('default_delay_between_orders', 0.7))
+    app = current_app._get_current_object()
+    
+    def process_order(order_item) -> Dict:
+        order_key, group_rows = order_item
+        limiter.acquire()
+        # Each worker thread needs its own app context (and with it its own DB session)
+        with app.app_context():
+            return process_single_order(
+                upload_id=upload_id,
+                order_key=order_key,
+                order_rows=[r['data'] for r in group_rows],
+                row_numbers=[r['row_number'] for r in group_rows],
+                column_mapping=column_mapping,
+                settings=settings,
+                api_client=api_client,
+                builder=get_builder(),
+                credential_id_for_logging=credential_id_for_logging,
+                projection=projection
+            )
+    
+    # The workers use their own sessions; don't keep this one's connection checked out meanwhile
+    db.session.close()
     
-    # Process each order
+    # Process orders concurrently - while one order waits on Cin7 the next can start
     successful_count = 0
     failed_count = 0
-    
-    for order_key, group_rows in row_groups.items():
-        # Extract row data and row numbers
-        row_data_list = [r['data'] for r in group_rows]
-        row_numbers = [r['row_number'] for r in group_rows]
-        
-        # Process order
-        result = process_single_order(
-            upload_id=upload_id,
-            order_key=order_key,
-            order_rows=row_data_list,
-            row_numbers=row_numbers,
-            column_mapping=column_mapping,
-            settings=settings,
-            api_client=api_client,
-            builder=builder,
-            credential_id_for_logging=credential_id_for_logging
-        )
-        
-        if result['status'] == 'success':
-            successful_count += 1
-        else:
-            failed_count += 1
-        
-        # Rate limiting delay between orders
-        delay = settings.get('default_delay_between_orders', 0.7)
-        time.sleep(delay)
+    try:
+        with ThreadPoolExecutor(max_workers=WEBHOOK_ORDER_WORKERS, thread_name_prefix='webhook-order') as order_executor:
+            for result in order_executor.map(process_order, row_groups.items()):
+                if result['status'] == 'success':
+                    successful_count += 1
+                else:
+                    failed_count += 1
+    finally:
+        # Write out whatever is still buffered, even if an order blew up
+        api_log_buffer.flush()
     
     # Update upload record
     upload = SalesOrderUpload.query.get(upload_id)
@@ -1171,6 +933,184 @@ def process_webhook_csv(
     }
 
 
+def _mark_upload_failed(upload_id, error_message: str) -> bool:
+    """
+    Mark an upload as failed with a single UPDATE and commit.
+    
+    Returns:
+        True if the upload row exists, False otherwise
+    """
+    result = db.session.execute(
+        update(SalesOrderUpload)
+        .where(SalesOrderUpload.id == upload_id)
+        .values(status='failed', error_log=[error_message], completed_at=func.now())
+    )
+    db.session.commit()
+    return result.rowcount > 0
+
+
+def _claim_upload(upload_id) -> bool:
+    """
+    Atomically move a queued upload to 'processing'.
+    
+    Only one job can win the claim, so an upload that is queued twice (e.g. by
+    the stale-upload sweep in another worker process) is never sent to Cin7 twice.
+    
+    Returns:
+        True if this caller claimed the upload
+    """
+    result = db.session.execute(
+        update(SalesOrderUpload)
+        .where(SalesOrderUpload.id == upload_id, SalesOrderUpload.status == 'queued')
+        .values(status='processing')
+    )
+    db.session.commit()
+    return result.rowcount > 0
+
+
+def _claim_order_retry(order_id) -> bool:
+    """
+    Atomically move an order that isn't succeeded or already in flight to
+    'processing', counting the retry.
+    
+    Only one caller can win the claim, so an order retried twice at once (the
+    same ID twice in a bulk retry, or two users) is never sent to Cin7 twice.
+    A retry still 'processing' after ORDER_RETRY_STALE_AFTER seconds was cut
+    off and can be claimed again.
+    
+    Returns:
+        True if this caller claimed the order
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=ORDER_RETRY_STALE_AFTER)
+    result = db.session.execute(
+        update(SalesOrderResult)
+        .where(
+            SalesOrderResult.id == order_id,
+            or_(
+                SalesOrderResult.status.notin_(('success', 'processing')),
+                and_(
+                    SalesOrderResult.status == 'processing',
+                    or_(SalesOrderResult.last_retry_at.is_(None), SalesOrderResult.last_retry_at < cutoff)
+                )
+            )
+        )
+        .values(
+            status='processing',
+            retry_count=func.coalesce(SalesOrderResult.retry_count, 0) + 1,
+            last_retry_at=now
+        )
+    )
+    db.session.commit()
+    return result.rowcount > 0
+
+
+def run_webhook_upload(app, upload_id):
+    """
+    Background job: run the CSV pipeline for a webhook upload and record the final status.
+    
+    Runs outside the request, so it pushes its own application context on the
+    running app - the job shares the app's engine and its already-open
+    connection pool instead of building a new app (and pool) per upload.
+    Everything else (CSV, credentials, filename) is read back from the upload
+    row, so the job can be re-queued from nothing but its ID.
+    """
+    logger.info(f"Starting background processing for upload {upload_id}")
+    with app.app_context():
+        try:
+            if not _claim_upload(upload_id):
+                logger.info(f"Upload {upload_id} is no longer queued - skipping")
+                return
+            
+            upload = SalesOrderUpload.query.options(undefer(SalesOrderUpload.csv_content)).get(upload_id)
+            if upload.csv_content:
+                result = process_webhook_csv(
+                    upload_id=upload_id,
+                    client_erp_credentials_id=upload.client_erp_credentials_id,
+                    csv_content=upload.csv_content,
+                    filename=upload.filename
+                )
+            else:
+                result = {'error': 'CSV content not found for upload'}
+            
+            if 'error' in result:
+                logger.error(f"Processing error for upload {upload_id}: {result.get('error')}")
+                if not _mark_upload_failed(upload_id, result.get('error')):
+                    logger.error(f"Upload {upload_id} not found in database during background processing")
+            else:
+                # process_webhook_csv already committed the final counts and status
+                logger.info(f"Background processing completed - upload_id: {upload_id}, orders: {result.get('total_orders', 0)}, successful: {result.get('successful', 0)}, failed: {result.get('failed', 0)}")
+        except Exception as process_error:
+            logger.error(f"Error in process_webhook_csv for upload {upload_id}: {str(process_error)}", exc_info=True)
+            try:
+                db.session.rollback()
+                error_msg = str(process_error)[:500]  # Limit error message length
+                _mark_upload_failed(upload_id, f'Processing error: {error_msg}')
+            except Exception as db_error:
+                logger.error(f"Error updating upload status after process error: {str(db_error)}", exc_info=True)
+        finally:
+            # Return this thread's connection to the shared pool
+            db.session.remove()
+            with _pending_uploads_lock:
+                _pending_uploads.discard(upload_id)
+
+
+def _submit_upload(app, upload_id) -> bool:
+    """Submit an upload to the worker pool unless this process already has it pending."""
+    with _pending_uploads_lock:
+        if upload_id in _pending_uploads:
+            return False
+        _pending_uploads.add(upload_id)
+    _webhook_executor.submit(run_webhook_upload, app, upload_id)
+    return True
+
+
+def _requeue_stale_uploads(app) -> int:
+    """
+    Queue uploads left in 'queued' by a worker that went away before running them.
+    
+    The in-process queue doesn't survive a restart or scale-down, but the upload
+    row does, so the table itself serves as the durable queue. Only 'queued' rows
+    are picked up - an upload that reached 'processing' may already have created
+    Sales in Cin7 and is left for a manual retry.
+    
+    Returns:
+        Number of uploads queued
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=WEBHOOK_REQUEUE_AFTER)
+    stale_ids = db.session.execute(
+        select(SalesOrderUpload.id)
+        .where(SalesOrderUpload.status == 'queued', SalesOrderUpload.created_at < cutoff)
+        .order_by(SalesOrderUpload.created_at)
+        .limit(20)
+    ).scalars().all()
+    requeued = 0
+    for stale_id in stale_ids:
+        # Still waiting in this process's own backlog - not lost
+        if _submit_upload(app, stale_id):
+            logger.warning(f"Re-queued stale upload {stale_id}")
+            requeued += 1
+    return requeued
+
+
+def enqueue_webhook_upload(upload_id):
+    """
+    Queue a webhook upload for background processing.
+    
+    Single hand-off point between the webhook route and the worker, so the
+    request thread never runs the Cin7 pipeline itself. Also sweeps up stale
+    queued uploads. Must be called inside a request/app context.
+    """
+    app = current_app._get_current_object()
+    _submit_upload(app, upload_id)
+    logger.info(f"Queued background processing for upload {upload_id}")
+    try:
+        _requeue_stale_uploads(app)
+    except Exception as e:
+        logger.warning(f"Could not check for stale uploads: {str(e)}")
+        db.session.rollback()
+
+
 @webhooks_bp.route('/email', methods=['POST'])
 def receive_email_webhook():
     """
@@ -1185,7 +1125,8 @@ def receive_email_webhook():
             payload = request.form.to_dict()
         
         # Log incoming webhook payload (for debugging)
-        logger.info(f"Received webhook payload: {str(payload)[:500]}")  # Log first 500 chars to avoid huge logs
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received webhook payload: %s", str(payload)[:500])  # Log first 500 chars to avoid huge logs
         
         if not payload:
             return jsonify({'error': 'No payload received'}), 400
@@ -1228,31 +1169,30 @@ def receive_email_webhook():
         if error:
             return jsonify({'error': f'Failed to extract CSV: {error}'}), 400
         
-        # Get client_id for upload record
-        client_query = text("""
-            SELECT client_id FROM voyager.client_erp_credentials
-            WHERE id = :cred_id
-        """)
-        client_result = db.session.execute(client_query, {'cred_id': client_erp_credentials_id})
-        client_row = client_result.fetchone()
-        client_id_for_upload = client_row.client_id if client_row and client_row.client_id else None
+        # Get client_id for upload record from the cached credentials bundle -
+        # this also warms the cache entry the background job reads next
+        bundle = load_settings_bundle(str(client_erp_credentials_id))
+        client_id_for_upload = bundle[0]['client_id'] if bundle else None
         
-        # Check for duplicate upload (same filename + credentials within last hour) - idempotency
+        # Check for duplicate upload (same CSV content + credentials within last hour) - idempotency
+        # Matching on content catches re-sends under a new filename and doesn't flag
+        # a different file that happens to reuse a name.
         # Use client_erp_credentials_id since that uniquely identifies the connection
         # (client_id can be None for standalone connections, causing false duplicates)
+        content_hash = hashlib.blake2b(csv_content, digest_size=16).hexdigest()
         one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        logger.info(f"Checking for duplicate upload - filename: {filename}, client_id: {client_id_for_upload}, client_erp_credentials_id: {client_erp_credentials_id}")
-        recent_duplicate = SalesOrderUpload.query.filter_by(
-            filename=filename,
-            client_erp_credentials_id=client_erp_credentials_id
+        logger.info(f"Checking for duplicate upload - filename: {filename}, content_hash: {content_hash}, client_erp_credentials_id: {client_erp_credentials_id}")
+        # Only the columns the duplicate record needs - never pull the stored CSV
+        recent_duplicate = db.session.query(
+            SalesOrderUpload.id,
+            SalesOrderUpload.created_at,
+            SalesOrderUpload.status
         ).filter(
+            SalesOrderUpload.client_erp_credentials_id == client_erp_credentials_id,
+            SalesOrderUpload.content_hash == content_hash,
             SalesOrderUpload.created_at >= one_hour_ago
         ).order_by(SalesOrderUpload.created_at.desc()).first()
         
-        # Store CSV content as base64 for preview
-        import base64
-        csv_base64 = base64.b64encode(csv_content).decode('utf-8')
-        
         # Create upload record immediately (even if duplicate, so it appears in UI)
         upload_id = uuid.uuid4()
         logger.info(f"Creating upload record - upload_id: {upload_id}, filename: {filename}, client_erp_credentials_id: {client_erp_credentials_id}, client_id: {client_id_for_upload}")
@@ -1277,7 +1217,8 @@ def receive_email_webhook():
                     'duplicate_of_created_at': recent_duplicate.created_at.isoformat() if recent_duplicate.created_at else None,
                     'duplicate_of_status': recent_duplicate.status
                 }],
-                csv_content=csv_base64  # Store CSV for preview
+                csv_content=csv_content,  # Store CSV for preview
+                content_hash=content_hash
             )
         else:
             logger.info(f"No duplicate found, proceeding with new upload creation")
@@ -1290,8 +1231,9 @@ def receive_email_webhook():
                 total_rows=0,  # Will be updated after parsing
                 successful_orders=0,
                 failed_orders=0,
-                status='processing',
-                csv_content=csv_base64  # Store CSV for preview
+                status='queued',  # Background job moves it to 'processing' when it starts
+                csv_content=csv_content,  # Store CSV for preview
+                content_hash=content_hash
             )
         db.session.add(upload)
         try:
@@ -1313,109 +1255,108 @@ def receive_email_webhook():
                 'duplicate': True
             }), 200  # Return 200 to prevent Missive from retrying
         
-        # Return 200 immediately to acknowledge webhook receipt
-        # Process CSV in background thread
-        def process_in_background():
-            """Process CSV in background thread"""
-            app = None
-            try:
-                logger.info(f"Starting background processing for upload {upload_id}")
-                # Create new database session for background thread
-                from app import create_app
-                app = create_app('production' if os.environ.get('FLASK_ENV') == 'production' else 'development')
-                with app.app_context():
-                    try:
-                        result = process_webhook_csv(
-                            upload_id=upload_id,
-                            client_erp_credentials_id=client_erp_credentials_id,
-                            csv_content=csv_content,
-                            filename=filename
-                        )
-                        
-                        upload = SalesOrderUpload.query.get(upload_id)
-                        if upload:
-                            if 'error' in result:
-                                logger.error(f"Processing error for upload {upload_id}: {result.get('error')}")
-                                upload.status = 'failed'
-                                upload.error_log = [result.get('error')]
-                                upload.completed_at = datetime.utcnow()
-                            else:
-                                # Check if there are any failed orders
-                                failed_count = result.get('failed', 0)
-                                upload.status = 'completed' if failed_count == 0 else 'failed'
-                                upload.completed_at = datetime.utcnow()
-                            db.session.commit()
-                            logger.info(f"Background processing completed - upload_id: {upload_id}, client: {client_name}, orders: {result.get('total_orders', 0)}, successful: {result.get('successful', 0)}, failed: {result.get('failed', 0)}")
-                        else:
-                            logger.error(f"Upload {upload_id} not found in database during background processing")
-                    except Exception as process_error:
-                        logger.error(f"Error in process_webhook_csv for upload {upload_id}: {str(process_error)}", exc_info=True)
-                        try:
-                            upload = SalesOrderUpload.query.get(upload_id)
-                            if upload:
-                                upload.status = 'failed'
-                                upload.error_log = [f'Processing error: {str(process_error)}']
-                                upload.completed_at = datetime.utcnow()
-                                db.session.commit()
-                        except Exception as db_error:
-                            logger.error(f"Error updating upload status after process error: {str(db_error)}", exc_info=True)
-                            raise
-                        raise
-                    finally:
-                        # Ensure session is closed and connections are returned to pool
-                        db.session.close()
-            except Exception as e:
-                logger.error(f"Error in background processing thread for upload {upload_id}: {str(e)}", exc_info=True)
-                # Try to update upload status, but don't create another app instance if we already have one
-                if app:
-                    try:
-                        with app.app_context():
-                            upload = SalesOrderUpload.query.get(upload_id)
-                            if upload:
-                                upload.status = 'failed'
-                                error_msg = str(e)[:500]  # Limit error message length
-                                upload.error_log = [f'Background processing thread error: {error_msg}']
-                                upload.completed_at = datetime.utcnow()
-                                db.session.commit()
-                                logger.info(f"Updated upload {upload_id} status to failed due to thread error")
-                            db.session.close()
-                    except Exception as db_error:
-                        logger.error(f"Error updating upload status: {str(db_error)}", exc_info=True)
-            finally:
-                # Dispose of the engine to close all connections from this app instance
-                if app and hasattr(app, 'extensions') and 'sqlalchemy' in app.extensions:
-                    try:
-                        db.engine.dispose()
-                        logger.debug(f"Disposed database engine for background thread {upload_id}")
-                    except Exception as dispose_error:
-                        logger.warning(f"Error disposing database engine: {str(dispose_error)}")
-        
-        # Start background processing
-        logger.info(f"Starting background thread for upload {upload_id}")
-        thread = threading.Thread(target=process_in_background, daemon=True)
-        thread.start()
-        logger.info(f"Background thread started for upload {upload_id}")
+        # Hand the pipeline off to a background worker and acknowledge right away
+        enqueue_webhook_upload(upload_id)
         
         logger.info(f"Webhook received and queued for processing - upload_id: {upload_id}, client: {client_name}, filename: {filename}")
         
-        # Return 200 immediately
-        return jsonify({
-            'message': 'Webhook received and processing started',
-            'upload_id': str(upload_id),
-            'status': 'processing',
+        # Return 202 - processing continues in the background
+        return orjson_response({
+            'message': 'Webhook received and queued for processing',
+            'upload_id': upload_id,
+            'status': 'queued',
             'client_name': client_name,
             'filename': filename
-        }), 200
+        }, 202)
     
     except Exception as e:
         logger.error(f"Error processing webhook: {str(e)}", exc_info=True)
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 
-def _retry_order_internal(order_result: SalesOrderResult) -> Tuple[Dict, Optional[str]]:
+# Credentials of an older upload that only recorded its client_id
+_RETRY_CLIENT_CREDENTIALS_QUERY = text("""
+    SELECT cec.id, cec.client_id
+    FROM voyager.client_erp_credentials cec
+    WHERE cec.client_id = :client_id
+    LIMIT 1
+""")
+
+
+def _retry_setup(client_erp_credentials_id) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Build what retrying an order for a credential needs: column mapping,
+    settings, API client and the preloaded customers/products.
+    
+    Returns (setup, error_message). Bulk retries build this once per credential
+    and share it across that credential's orders.
+    """
+    # Get column mapping and settings uncached - a retry usually follows a fix to the
+    # mapping or settings, and the write only cleared the cache of the worker that handled it
+    column_mapping = load_default_column_mapping.__wrapped__(str(client_erp_credentials_id))
+    if column_mapping is None:
+        return None, 'Column mapping not found'
+    
+    # Get settings and credentials (same single query as webhook processing)
+    bundle = load_settings_bundle.__wrapped__(str(client_erp_credentials_id))
+    if not bundle:
+        return None, 'Credentials not found'
+    creds, settings = bundle
+    
+    # Initialize API client
+    api_client = Cin7SalesAPI(
+        account_id=str(creds['account_id']),
+        application_key=str(creds['application_key']),
+        base_url='https://inventory.dearsystems.com/ExternalApi/v2/',
+        logger_callback=lambda **kwargs: None  # Disable logging for retry
+    )
+    
+    # Preload customers and products from database cache for better performance
+    validator_for_preload = SalesOrderValidator(api_client)
+    try:
+        customer_count, product_count = validator_for_preload.preload_customers_and_products(
+            db_session=db.session,
+            client_erp_credentials_id=client_erp_credentials_id
+        )
+        logger.info(f"Preloaded {customer_count} customers and {product_count} products for retry")
+    except Exception as e:
+        logger.warning(f"Warning: Failed to preload customers/products: {str(e)}")
+    
+    # Builders keep per-build state, so callers create their own from the preloaded data
+    return {
+        'column_mapping': column_mapping,
+        'settings': settings,
+        'api_client': api_client,
+        'preloaded_customers': getattr(validator_for_preload, 'customer_lookup', {}),
+        'preloaded_products': getattr(validator_for_preload, 'product_lookup', {})
+    }, None
+
+
+def _retry_cached(retry_cache: Dict, key, build):
+    """
+    Return retry_cache[key], calling build() to fill it on first use.
+    
+    Bulk retries run on several threads; a per-key lock makes sure each entry
+    is built once even when threads ask for it at the same time.
+    """
+    entry = retry_cache.get(key)
+    if entry is None:
+        # setdefault is atomic, so every thread gets the same lock for the key
+        with retry_cache.setdefault(('lock', key), threading.Lock()):
+            entry = retry_cache.get(key)
+            if entry is None:
+                entry = retry_cache[key] = build()
+    return entry
+
+
+def _retry_order_internal(order_result: SalesOrderResult, retry_cache: Optional[Dict] = None) -> Tuple[Dict, Optional[str]]:
     """
     Internal helper function to retry processing a failed order.
     Returns (result_dict, error_message)
+    
+    retry_cache, when given, is shared across calls (bulk retry) so each
+    upload's CSV is parsed once and each credential's setup (_retry_setup)
+    is built once instead of once per retried order.
     """
     try:
         if order_result.status == 'success':
@@ -1432,13 +1373,7 @@ def _retry_order_internal(order_result: SalesOrderResult) -> Tuple[Dict, Optiona
         else:
             # Fallback: try to find credentials by client_id (for older uploads)
             if upload.client_id:
-                client_query = text("""
-                    SELECT cec.id, cec.client_id
-                    FROM voyager.client_erp_credentials cec
-                    WHERE cec.client_id = :client_id
-                    LIMIT 1
-                """)
-                result = db.session.execute(client_query, {'client_id': upload.client_id})
+                result = db.session.execute(_RETRY_CLIENT_CREDENTIALS_QUERY, {'client_id': upload.client_id})
                 cred_row = result.fetchone()
                 
                 if not cred_row:
@@ -1448,167 +1383,71 @@ def _retry_order_internal(order_result: SalesOrderResult) -> Tuple[Dict, Optiona
             else:
                 return None, 'Client credentials not found'
         
-        # Decode CSV content
-        import base64
-        csv_content = base64.b64decode(upload.csv_content) if upload.csv_content else None
-        if not csv_content:
-            return None, 'CSV content not available'
-        
-        # Parse CSV to get the specific rows for this order
-        parser = CSVParser()
-        rows, errors, skipped = parser.parse_file(csv_content, upload.filename)
-        
-        if errors:
-            return None, f'Failed to parse CSV: {errors[0]}'
+        # Parse CSV to get the specific rows for this order. csv_content is deferred,
+        # so the blob is only fetched below, when this upload hasn't been parsed yet.
+        if retry_cache is None:
+            csv_content = upload.csv_content
+            if not csv_content:
+                return None, 'CSV content not available'
+            
+            # Single retry - only read the file up to this order's last row
+            parser = CSVParser()
+            order_rows, errors = parser.find_rows(csv_content, order_result.row_numbers or [], upload.filename)
+            if errors:
+                return None, f'Failed to parse CSV: {errors[0]}'
+        else:
+            # (error message, rows by row number), shared by all orders of the upload
+            def parse_upload_csv():
+                csv_content = upload.csv_content
+                if not csv_content:
+                    return 'CSV content not available', {}
+                
+                parser = CSVParser()
+                rows, errors, skipped = parser.parse_file(csv_content, upload.filename)
+                if errors:
+                    return f'Failed to parse CSV: {errors[0]}', {}
+                return None, {r['row_number']: r for r in rows}
+            
+            parse_error, rows_by_number = _retry_cached(retry_cache, ('csv', upload.id), parse_upload_csv)
+            if parse_error:
+                return None, parse_error
+            
+            # Pick this order's rows by row_numbers from order_result (in CSV order)
+            order_rows = [rows_by_number[n] for n in sorted(set(order_result.row_numbers or [])) if n in rows_by_number]
         
-        # Filter rows by row_numbers from order_result
-        order_rows = [r for r in rows if r['row_number'] in (order_result.row_numbers or [])]
         if not order_rows:
             return None, 'Order rows not found in CSV'
         
-        # Get column mapping
-        default_mapping_obj = ClientCsvMapping.query.filter_by(
-            client_erp_credentials_id=client_erp_credentials_id,
-            is_default=True
-        ).first()
-        
-        if not default_mapping_obj:
-            return None, 'Column mapping not found'
-        
-        column_mapping = default_mapping_obj.column_mapping or {}
-        
-        # Get settings and credentials
-        check_customer_cols_query = text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_schema = 'voyager' 
-            AND table_name = 'client_erp_credentials' 
-            AND column_name IN ('customer_account_receivable', 'customer_revenue_account', 'customer_tax_rule', 'customer_attribute_set')
-        """)
-        existing_customer_cols = {row[0] for row in db.session.execute(check_customer_cols_query).fetchall()}
-        
-        select_fields = [
-            'cec.id',
-            'cec.cin7_api_auth_accountid as account_id',
-            'cec.cin7_api_auth_applicationkey as application_key',
-            'cec.client_id',
-            'cec.sale_type',
-            'cec.tax_rule',
-            'cec.default_status'
-        ]
-        
-        if 'customer_account_receivable' in existing_customer_cols:
-            select_fields.append('cec.customer_account_receivable')
-        if 'customer_revenue_account' in existing_customer_cols:
-            select_fields.append('cec.customer_revenue_account')
-        if 'customer_tax_rule' in existing_customer_cols:
-            select_fields.append('cec.customer_tax_rule')
-        if 'customer_attribute_set' in existing_customer_cols:
-            select_fields.append('cec.customer_attribute_set')
-        
-        cred_query = text(f"""
-            SELECT {', '.join(select_fields)}
-            FROM voyager.client_erp_credentials cec
-            WHERE cec.id = :cred_id
-        """)
-        cred_result = db.session.execute(cred_query, {'cred_id': client_erp_credentials_id})
-        cred_row = cred_result.fetchone()
-        
-        if not cred_row:
-            return None, 'Credentials not found'
-        
-        # Extract values from cred_row
-        account_id = cred_row.account_id
-        application_key = cred_row.application_key
-        sale_type = getattr(cred_row, 'sale_type', None)
-        tax_rule = getattr(cred_row, 'tax_rule', None)
-        default_status = getattr(cred_row, 'default_status', None)
-        
-        # Extract customer default fields
-        customer_account_receivable = None
-        customer_revenue_account = None
-        customer_tax_rule = None
-        customer_attribute_set = None
-        
-        if 'customer_account_receivable' in existing_customer_cols and hasattr(cred_row, 'customer_account_receivable'):
-            customer_account_receivable = cred_row.customer_account_receivable if cred_row.customer_account_receivable else None
-        if 'customer_revenue_account' in existing_customer_cols and hasattr(cred_row, 'customer_revenue_account'):
-            customer_revenue_account = cred_row.customer_revenue_account if cred_row.customer_revenue_account else None
-        if 'customer_tax_rule' in existing_customer_cols and hasattr(cred_row, 'customer_tax_rule'):
-            customer_tax_rule = str(cred_row.customer_tax_rule) if cred_row.customer_tax_rule else None
-        if 'customer_attribute_set' in existing_customer_cols and hasattr(cred_row, 'customer_attribute_set'):
-            customer_attribute_set = cred_row.customer_attribute_set
-        
-        # Get settings
-        settings_obj = None
-        if cred_row.client_id:
-            settings_obj = ClientSettings.query.filter_by(client_id=cred_row.client_id).first()
-        
-        settings = {}
-        if settings_obj:
-            settings = {
-                'default_status': default_status or settings_obj.default_status,
-                'default_currency': settings_obj.default_currency,
-                'tax_inclusive': settings_obj.tax_inclusive,
-                'default_location': settings_obj.default_location,
-                'default_delay_between_orders': settings_obj.default_delay_between_orders,
-                'sale_type': sale_type,
-                'tax_rule': tax_rule,
-                'customer_account_receivable': customer_account_receivable,
-                'customer_revenue_account': customer_revenue_account,
-                'customer_tax_rule': customer_tax_rule,
-                'customer_attribute_set': customer_attribute_set
-            }
+        # Mapping, settings, API client and preloaded data - shared across a bulk retry's orders
+        if retry_cache is None:
+            setup, setup_error = _retry_setup(client_erp_credentials_id)
         else:
-            settings = {
-                'default_status': default_status or 'DRAFT',
-                'default_currency': 'USD',
-                'tax_inclusive': False,
-                'default_location': None,
-                'default_delay_between_orders': 0.7,
-                'sale_type': sale_type,
-                'tax_rule': tax_rule,
-                'customer_account_receivable': customer_account_receivable,
-                'customer_revenue_account': customer_revenue_account,
-                'customer_tax_rule': customer_tax_rule,
-                'customer_attribute_set': customer_attribute_set
-            }
-        
-        # Initialize API client and builder
-        api_client = Cin7SalesAPI(
-            account_id=str(cred_row.account_id),
-            application_key=str(cred_row.application_key),
-            base_url='https://inventory.dearsystems.com/ExternalApi/v2/',
-            logger_callback=lambda **kwargs: None  # Disable logging for retry
-        )
-        
-        # Preload customers and products from database cache for better performance
-        validator_for_preload = SalesOrderValidator(api_client)
-        try:
-            customer_count, product_count = validator_for_preload.preload_customers_and_products(
-                db_session=db.session,
-                client_erp_credentials_id=client_erp_credentials_id
+            setup, setup_error = _retry_cached(
+                retry_cache, ('setup', client_erp_credentials_id),
+                lambda: _retry_setup(client_erp_credentials_id)
             )
-            logger.info(f"Preloaded {customer_count} customers and {product_count} products for retry")
-        except Exception as e:
-            logger.warning(f"Warning: Failed to preload customers/products: {str(e)}")
-        
-        # Initialize builder with preloaded data
+        if setup_error:
+            return None, setup_error
+        column_mapping = setup['column_mapping']
+        settings = setup['settings']
+        api_client = setup['api_client']
         builder = SalesOrderBuilder(
             settings, 
             api_client,
-            preloaded_customers=getattr(validator_for_preload, 'customer_lookup', {}),
-            preloaded_products=getattr(validator_for_preload, 'product_lookup', {})
+            preloaded_customers=setup['preloaded_customers'],
+            preloaded_products=setup['preloaded_products']
         )
         
         # Extract row data
         row_data_list = [r['data'] for r in order_rows]
         row_numbers = [r['row_number'] for r in order_rows]
         
-        # Update retry tracking before processing
-        order_result.retry_count = (order_result.retry_count or 0) + 1
-        order_result.last_retry_at = datetime.utcnow()
-        db.session.commit()
+        # Claim the order (and update retry tracking) before anything is sent to Cin7.
+        # The commit expires order_result, so its status below is re-read.
+        if not _claim_order_retry(order_result.id):
+            if order_result.status == 'success':
+                return None, 'Order already succeeded'
+            return None, 'Order is already being retried'
         
         # Process the order (pass existing order_result so it gets updated in place)
         result = process_single_order(
@@ -1642,6 +1481,33 @@ def _retry_order_internal(order_result: SalesOrderResult) -> Tuple[Dict, Optiona
         return None, f'Internal server error: {str(e)}'
 
 
+# An upload's API logs as one JSON array (oldest first to see the sequence), plus the count.
+# json (not jsonb) keeps each payload's key order. raw_response_body_text, when
+# present, preserves Cin7's exact response and is returned as a string in place of
+# response_body. request_body values stored as JSON-encoded strings by older
+# versions stay strings - the frontend parses string payloads itself.
+_ORDER_API_LOGS_QUERY = text("""
+    SELECT
+        COALESCE(json_agg(json_build_object(
+            'id', l.id,
+            'endpoint', l.endpoint,
+            'method', l.method,
+            'request_url', l.request_url,
+            'request_headers', l.request_headers,
+            'request_body', l.request_body,
+            'response_status', l.response_status,
+            'response_body', COALESCE(to_json(NULLIF(l.raw_response_body_text, '')), l.response_body),
+            'error_message', l.error_message,
+            'duration_ms', l.duration_ms,
+            'trigger', l.trigger,
+            'created_at', l.created_at
+        ) ORDER BY l.created_at), '[]'::json)::text AS logs,
+        COUNT(*) AS total
+    FROM cin7_uploader.cin7_api_log l
+    WHERE l.upload_id = :upload_id
+""")
+
+
 @webhooks_bp.route('/orders/<order_result_id>/api-logs', methods=['GET'])
 @jwt_required()
 def get_order_api_logs(order_result_id):
@@ -1667,56 +1533,23 @@ def get_order_api_logs(order_result_id):
         if not upload:
             return jsonify({'error': 'Upload not found'}), 404
         
-        # Get all API logs for this upload
-        # Get all logs for the upload - they're all related to processing orders from this upload
+        # Get all logs for the upload - they're all related to processing orders from this upload.
+        # Postgres builds the logs array as JSON text, which is passed through to the
+        # response instead of loading ORM objects and re-encoding every payload.
         logger.info(f"Fetching API logs for order {order_result_id}, upload_id: {order_result.upload_id}")
-        logs_query = Cin7ApiLog.query.filter_by(upload_id=order_result.upload_id)
-        
-        # Order by creation time (oldest first to see the sequence)
-        logs_query = logs_query.order_by(Cin7ApiLog.created_at.asc())
-        
-        logs = logs_query.all()
-        logger.info(f"Found {len(logs)} API logs for upload_id {order_result.upload_id}")
-        
-        # Format response
-        logs_data = []
-        for log in logs:
-            # Use raw_response_body_text if available (preserves exact key order)
-            # Otherwise fall back to response_body (parsed, may have reordered keys)
-            response_body = log.raw_response_body_text if log.raw_response_body_text else log.response_body
-            
-            # Parse request_body if it's a string
-            request_body = log.request_body
-            if isinstance(request_body, str):
-                try:
-                    import json
-                    request_body = json.loads(request_body)
-                except (json.JSONDecodeError, TypeError):
-                    # Keep as string if not valid JSON
-                    pass
-            
-            logs_data.append({
-                'id': str(log.id),
-                'endpoint': log.endpoint,
-                'method': log.method,
-                'request_url': log.request_url,
-                'request_headers': log.request_headers,
-                'request_body': request_body,
-                'response_status': log.response_status,
-                'response_body': response_body,
-                'error_message': log.error_message,
-                'duration_ms': log.duration_ms,
-                'trigger': log.trigger,
-                'created_at': log.created_at.isoformat() if log.created_at else None
-            })
-        
-        logger.info(f"Returning {len(logs_data)} API logs for order {order_result_id}")
-        return jsonify({
-            'logs': logs_data,
-            'total': len(logs_data),
-            'upload_id': str(order_result.upload_id),
-            'order_id': str(order_result.id)
-        }), 200
+        logs_json, total = db.session.execute(
+            _ORDER_API_LOGS_QUERY, {'upload_id': str(order_result.upload_id)}
+        ).one()
+        logger.info(f"Returning {total} API logs for order {order_result_id}")
+        
+        body = b''.join((
+            b'{"logs":', logs_json.encode('utf-8'),
+            b',"total":', orjson.dumps(total),
+            b',"upload_id":', orjson.dumps(str(order_result.upload_id)),
+            b',"order_id":', orjson.dumps(str(order_result.id)),
+            b'}'
+        ))
+        return json_body_response(body)
     
     except Exception as e:
         logger.error(f"Error fetching API logs for order {order_result_id}: {str(e)}", exc_info=True)
@@ -1735,6 +1568,8 @@ def retry_order(order_result_id):
             return jsonify({'error': 'Order result not found'}), 404
         
         result, error = _retry_order_internal(order_result)
+        if error == 'Order is already being retried':
+            return jsonify({'error': error}), 409
         if error:
             return jsonify({'error': error}), 400 if error in ['Order already succeeded', 'Upload not found', 'Client credentials not found', 'CSV content not available', 'Order rows not found in CSV', 'Column mapping not found', 'Credentials not found'] else 500
         
@@ -1747,12 +1582,151 @@ def retry_order(order_result_id):
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 
+# Loads each listed order's upload in one extra SELECT for the whole page, with only the
+# columns _order_upload_context reads (csv_content can be large)
+_LISTING_UPLOAD_LOAD = selectinload(SalesOrderResult.upload).load_only(
+    SalesOrderUpload.filename, SalesOrderUpload.created_at, SalesOrderUpload.client_id
+)
+
+
+def _order_upload_context(upload) -> Optional[Dict[str, Any]]:
+    """Upload summary attached to each order in the failed/completed listings."""
+    if not upload:
+        return None
+    return {
+        'id': str(upload.id),
+        'filename': upload.filename,
+        'created_at': upload.created_at.isoformat() if upload.created_at else None,
+        'client_name': get_client_name(upload.client_id)
+    }
+
+
+def _failed_order_to_dict(order_result, upload, order_data: Dict[str, Any], include_order_data: bool) -> Dict[str, Any]:
+    """Failed orders listing shape of a SalesOrderResult (order_data: full or projected, see _order_results_page)."""
+    result = {
+        'id': str(order_result.id),
+        'order_key': order_result.order_key,
+        'customer_name': order_data.get('customer_name') or order_data.get('customername', ''),
+        'po_number': order_data.get('po_number') or order_data.get('customerreference', ''),
+        'error_type': order_result.error_type,
+        'error_message': order_result.error_message,
+        'sale_id': str(order_result.sale_id) if order_result.sale_id else None,
+        'sale_order_id': str(order_result.sale_order_id) if order_result.sale_order_id else None,
+        'retry_count': order_result.retry_count or 0,
+        'last_retry_at': order_result.last_retry_at.isoformat() if order_result.last_retry_at else None,
+        'resolved_at': order_result.resolved_at.isoformat() if order_result.resolved_at else None,
+        'resolved_by': str(order_result.resolved_by) if order_result.resolved_by else None,
+        'upload': _order_upload_context(upload),
+        'matching_details': order_data.get('matching_details'),
+        'attempted_send': order_data.get('attempted_send'),
+        'sale_payload': order_data.get('sale_payload'),
+        'sale_order_payload': order_data.get('sale_order_payload'),
+        'what_is_needed': order_data.get('what_is_needed'),
+        'created_at': order_result.created_at.isoformat() if order_result.created_at else None,
+        'processed_at': order_result.processed_at.isoformat() if order_result.processed_at else None
+    }
+    if include_order_data:
+        result['order_data'] = order_data
+    return result
+
+
+def _completed_order_to_dict(order_result, upload, order_data: Dict[str, Any], include_order_data: bool) -> Dict[str, Any]:
+    """Completed orders listing shape of a SalesOrderResult (order_data: full or projected, see _order_results_page)."""
+    result = {
+        'id': str(order_result.id),
+        'order_key': order_result.order_key,
+        'customer_name': order_data.get('customer_name') or order_data.get('customername', ''),
+        'po_number': order_data.get('po_number') or order_data.get('customerreference', ''),
+        'sale_id': str(order_result.sale_id) if order_result.sale_id else None,
+        'sale_order_id': str(order_result.sale_order_id) if order_result.sale_order_id else None,
+        'retry_count': order_result.retry_count or 0,
+        'reviewed': order_result.reviewed if order_result.reviewed is not None else False,
+        'upload': _order_upload_context(upload),
+        'matching_details': order_data.get('matching_details'),
+        'attempted_send': order_data.get('attempted_send'),
+        'sale_payload': order_data.get('sale_payload'),
+        'sale_order_payload': order_data.get('sale_order_payload'),
+        'created_at': order_result.created_at.isoformat() if order_result.created_at else None,
+        'processed_at': order_result.processed_at.isoformat() if order_result.processed_at else None
+    }
+    if include_order_data:
+        result['order_data'] = order_data
+    return result
+
+
+# order_data keys the failed/completed listings read. Unless the caller asks for the
+# full order_data, only these are fetched (with JSON operators), so the rest of each
+# payload - API responses, row data - stays in the database.
+_LISTING_ORDER_DATA_KEYS = (
+    'customer_name', 'customername', 'po_number', 'customerreference',
+    'matching_details', 'attempted_send', 'sale_payload', 'sale_order_payload', 'what_is_needed'
+)
+
+
+def _order_results_page(query, limit: int, offset: int, cursor: Optional[str], with_total: bool,
+                        include_order_data: bool = False):
+    """
+    Fetch one newest-first page of a SalesOrderResult query.
+    
+    Keyset pagination on (created_at, id): a cursor from the previous page
+    turns into a WHERE on the composite index instead of an OFFSET that reads
+    and discards every earlier row. The total is counted in the same SELECT
+    (window count before LIMIT) and only when asked for.
+    
+    Returns (results, next_cursor, total) - results is a list of (order_result,
+    order_data) pairs, where order_data is the full column when include_order_data
+    is set and otherwise only the _LISTING_ORDER_DATA_KEYS that are present.
+    results is None if the cursor is invalid.
+    """
+    if not include_order_data:
+        query = query.options(defer(SalesOrderResult.order_data)).add_columns(
+            *(SalesOrderResult.order_data[key].label(key) for key in _LISTING_ORDER_DATA_KEYS)
+        )
+    
+    if cursor:
+        decoded_cursor = _decode_cursor(cursor)
+        if not decoded_cursor:
+            return None, None, None
+        query = query.filter(tuple_(SalesOrderResult.created_at, SalesOrderResult.id) < tuple_(*decoded_cursor))
+    
+    if with_total:
+        query = query.add_columns(func.count().over().label('total_count'))
+    
+    # Newest first; id breaks ties so the keyset is unique
+    query = query.order_by(SalesOrderResult.created_at.desc(), SalesOrderResult.id.desc()).limit(limit)
+    if offset:
+        query = query.offset(offset)
+    rows = query.all()
+    
+    total = None
+    if with_total:
+        total = rows[0].total_count if rows else 0
+    
+    if include_order_data:
+        order_results = [row[0] for row in rows] if with_total else rows
+        page = [(order_result, order_result.order_data or {}) for order_result in order_results]
+    else:
+        page = [
+            (row[0], {key: row._mapping[key] for key in _LISTING_ORDER_DATA_KEYS if row._mapping[key] is not None})
+            for row in rows
+        ]
+    
+    next_cursor = None
+    if page and len(page) == limit:
+        next_cursor = _encode_cursor(page[-1][0].created_at, page[-1][0].id)
+    return page, next_cursor, total
+
+
 @webhooks_bp.route('/orders/failed', methods=['GET'])
 @jwt_required()
 def get_failed_orders():
     """
     Get all failed orders across all uploads (unresolved only by default).
     Returns list of failed orders with upload context.
+    
+    Paginated by keyset: pass the returned next_cursor as ?cursor= to get the
+    next page. The total count is only computed when ?with_total=1 is given.
+    The raw order_data of each order is omitted unless ?include=order_data.
     """
     try:
         # Get query parameters
@@ -1761,9 +1735,12 @@ def get_failed_orders():
         include_resolved = request.args.get('include_resolved', 'false').lower() == 'true'
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
+        with_total = request.args.get('with_total', '').lower() in ('1', 'true', 'yes')
+        include_order_data = 'order_data' in request.args.get('include', '').split(',')
         
         # Build query
-        query = SalesOrderResult.query.filter_by(status='failed')
+        query = SalesOrderResult.query.options(_LISTING_UPLOAD_LOAD).filter_by(status='failed')
         
         # Filter by resolved status
         if not include_resolved:
@@ -1781,67 +1758,26 @@ def get_failed_orders():
             except ValueError:
                 return jsonify({'error': 'Invalid client_id format'}), 400
         
-        # Get total count
-        total = query.count()
-        
-        # Order by created_at descending (most recent first)
-        query = query.order_by(SalesOrderResult.created_at.desc())
-        
-        # Apply pagination
-        failed_orders = query.limit(limit).offset(offset).all()
+        page, next_cursor, total = _order_results_page(query, limit, offset, cursor, with_total, include_order_data)
+        if page is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        failed_orders = page
         
         # Build response
-        result = []
-        for order_result in failed_orders:
-            upload = SalesOrderUpload.query.get(order_result.upload_id)
-            client_name = None
-            if upload and upload.client_id:
-                try:
-                    client = Client.query.get(upload.client_id)
-                    if client:
-                        client_name = client.name
-                except Exception:
-                    pass
-            
-            # Extract order details from order_data
-            order_data = order_result.order_data or {}
-            customer_name = order_data.get('customer_name') or order_data.get('customername', '')
-            po_number = order_data.get('po_number') or order_data.get('customerreference', '')
-            
-            result.append({
-                'id': str(order_result.id),
-                'order_key': order_result.order_key,
-                'customer_name': customer_name,
-                'po_number': po_number,
-                'error_type': order_result.error_type,
-                'error_message': order_result.error_message,
-                'sale_id': str(order_result.sale_id) if order_result.sale_id else None,
-                'sale_order_id': str(order_result.sale_order_id) if order_result.sale_order_id else None,
-                'retry_count': order_result.retry_count or 0,
-                'last_retry_at': order_result.last_retry_at.isoformat() if order_result.last_retry_at else None,
-                'resolved_at': order_result.resolved_at.isoformat() if order_result.resolved_at else None,
-                'resolved_by': str(order_result.resolved_by) if order_result.resolved_by else None,
-                'upload': {
-                    'id': str(upload.id) if upload else None,
-                    'filename': upload.filename if upload else None,
-                    'created_at': upload.created_at.isoformat() if upload and upload.created_at else None,
-                    'client_name': client_name
-                } if upload else None,
-                'order_data': order_data,
-                'matching_details': order_data.get('matching_details'),
-                'sale_payload': order_data.get('sale_payload'),
-                'sale_order_payload': order_data.get('sale_order_payload'),
-                'what_is_needed': order_data.get('what_is_needed'),
-                'created_at': order_result.created_at.isoformat() if order_result.created_at else None,
-                'processed_at': order_result.processed_at.isoformat() if order_result.processed_at else None
-            })
+        result = [
+            _failed_order_to_dict(order_result, order_result.upload, order_data, include_order_data)
+            for order_result, order_data in failed_orders
+        ]
         
-        return jsonify({
+        response = {
             'failed_orders': result,
-            'total': total,
+            'next_cursor': next_cursor,
             'limit': limit,
             'offset': offset
-        }), 200
+        }
+        if with_total:
+            response['total'] = total
+        return jsonify(response), 200
     
     except Exception as e:
         logger.error(f"Error getting failed orders: {str(e)}", exc_info=True)
@@ -1864,65 +1800,116 @@ def bulk_retry_orders():
         if not isinstance(order_ids, list):
             return jsonify({'error': 'order_ids must be a list'}), 400
         
-        results = []
-        for order_id_str in order_ids:
+        # Results in request order; filled in below, some before any retry starts
+        results = [None] * len(order_ids)
+        order_uuids = {}
+        for index, order_id_str in enumerate(order_ids):
             try:
-                order_id = uuid.UUID(order_id_str)
-                order_result = SalesOrderResult.query.get(order_id)
-                
-                if not order_result:
-                    results.append({
-                        'order_id': order_id_str,
-                        'status': 'error',
-                        'error': 'Order not found'
-                    })
-                    continue
-                
-                if order_result.status == 'success':
-                    results.append({
-                        'order_id': order_id_str,
-                        'status': 'skipped',
-                        'error': 'Order already succeeded'
-                    })
-                    continue
-                
-                # Use internal retry function
-                retry_result, retry_error = _retry_order_internal(order_result)
-                
-                if retry_error:
-                    results.append({
-                        'order_id': order_id_str,
-                        'status': 'error',
-                        'error': retry_error
-                    })
-                else:
-                    results.append({
-                        'order_id': order_id_str,
-                        'status': retry_result.get('status'),
-                        'sale_id': retry_result.get('sale_id'),
-                        'sale_order_id': retry_result.get('sale_order_id'),
-                        'error_message': retry_result.get('error_message')
-                    })
-            
+                order_uuids[index] = uuid.UUID(order_id_str)
             except ValueError:
-                results.append({
+                results[index] = {
                     'order_id': order_id_str,
                     'status': 'error',
                     'error': 'Invalid order ID format'
-                })
+                }
             except Exception as e:
-                logger.error(f"Error retrying order {order_id_str}: {str(e)}", exc_info=True)
-                results.append({
+                results[index] = {
                     'order_id': order_id_str,
                     'status': 'error',
                     'error': str(e)
-                })
+                }
         
+        # One query for the status of every requested order - missing and already
+        # successful orders are answered here and never reach the retry workers
+        statuses = {}
+        if order_uuids:
+            statuses = dict(
+                db.session.query(SalesOrderResult.id, SalesOrderResult.status)
+                .filter(SalesOrderResult.id.in_(set(order_uuids.values())))
+                .all()
+            )
+        
+        # Request indexes per order - an ID listed twice is retried once and both
+        # entries get its result
+        retry_indexes = {}
+        for index, order_id in order_uuids.items():
+            status = statuses.get(order_id)
+            if status is None:
+                results[index] = {
+                    'order_id': order_ids[index],
+                    'status': 'error',
+                    'error': 'Order not found'
+                }
+            elif status == 'success':
+                results[index] = {
+                    'order_id': order_ids[index],
+                    'status': 'skipped',
+                    'error': 'Order already succeeded'
+                }
+            else:
+                retry_indexes.setdefault(order_id, []).append(index)
+        to_retry = [(indexes[0], order_id) for order_id, indexes in retry_indexes.items()]
+        
+        # Orders retried together usually share an upload and credential - parse each
+        # CSV and build each credential's API client/preloaded data once
+        retry_cache = {}
+        app = current_app._get_current_object()
+        
+        def retry_one(item) -> Dict[str, Any]:
+            index, order_id = item
+            order_id_str = order_ids[index]
+            # Each worker thread needs its own app context (and with it its own DB session)
+            with app.app_context():
+                try:
+                    order_result = SalesOrderResult.query.get(order_id)
+                    if not order_result:
+                        return {
+                            'order_id': order_id_str,
+                            'status': 'error',
+                            'error': 'Order not found'
+                        }
+                    
+                    # Use internal retry function
+                    retry_result, retry_error = _retry_order_internal(order_result, retry_cache)
+                    
+                    if retry_error:
+                        return {
+                            'order_id': order_id_str,
+                            'status': 'error',
+                            'error': retry_error
+                        }
+                    return {
+                        'order_id': order_id_str,
+                        'status': retry_result.get('status'),
+                        'sale_id': retry_result.get('sale_id'),
+                        'sale_order_id': retry_result.get('sale_order_id'),
+                        'error_message': retry_result.get('error_message')
+                    }
+                
+                except Exception as e:
+                    logger.error(f"Error retrying order {order_id_str}: {str(e)}", exc_info=True)
+                    return {
+                        'order_id': order_id_str,
+                        'status': 'error',
+                        'error': str(e)
+                    }
+        
+        # Retry orders concurrently - while one waits on Cin7 the next can start. The
+        # account's shared API limiter keeps the combined request rate within Cin7's limits.
+        # The workers use their own sessions; don't keep this one's connection checked out meanwhile.
+        db.session.close()
+        if to_retry:
+            with ThreadPoolExecutor(max_workers=WEBHOOK_ORDER_WORKERS, thread_name_prefix='bulk-retry') as retry_executor:
+                for (_, order_id), result in zip(to_retry, retry_executor.map(retry_one, to_retry)):
+                    for index in retry_indexes[order_id]:
+                        results[index] = {**result, 'order_id': order_ids[index]}
+        
+        status_counts = Counter(r.get('status') for r in results)
         return jsonify({
             'results': results,
             'total': len(results),
-            'successful': len([r for r in results if r.get('status') == 'success']),
-            'failed': len([r for r in results if r.get('status') in ['error', 'failed']])
+            'successful': status_counts['success'],
+            'failed': status_counts['error'] + status_counts['failed']
         }), 200
     
     except Exception as e:
@@ -1982,15 +1969,22 @@ def get_completed_orders():
     """
     Get all completed/successful orders across all uploads.
     Returns list of successful orders with upload context.
+    
+    Paginated by keyset: pass the returned next_cursor as ?cursor= to get the
+    next page. The total count is only computed when ?with_total=1 is given.
+    The raw order_data of each order is omitted unless ?include=order_data.
     """
     try:
         # Get query parameters
         client_id = request.args.get('client_id')
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
+        with_total = request.args.get('with_total', '').lower() in ('1', 'true', 'yes')
+        include_order_data = 'order_data' in request.args.get('include', '').split(',')
         
         # Build query
-        query = SalesOrderResult.query.filter_by(status='success')
+        query = SalesOrderResult.query.options(_LISTING_UPLOAD_LOAD).filter_by(status='success')
         
         # Filter by client_id if provided
         if client_id:
@@ -2000,62 +1994,26 @@ def get_completed_orders():
             except ValueError:
                 return jsonify({'error': 'Invalid client_id format'}), 400
         
-        # Get total count
-        total = query.count()
-        
-        # Order by created_at descending (most recent first)
-        query = query.order_by(SalesOrderResult.created_at.desc())
-        
-        # Apply pagination
-        completed_orders = query.limit(limit).offset(offset).all()
+        page, next_cursor, total = _order_results_page(query, limit, offset, cursor, with_total, include_order_data)
+        if page is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        completed_orders = page
         
         # Build response
-        result = []
-        for order_result in completed_orders:
-            upload = SalesOrderUpload.query.get(order_result.upload_id)
-            client_name = None
-            if upload and upload.client_id:
-                try:
-                    client = Client.query.get(upload.client_id)
-                    if client:
-                        client_name = client.name
-                except Exception:
-                    pass
-            
-            # Extract order details from order_data
-            order_data = order_result.order_data or {}
-            customer_name = order_data.get('customer_name') or order_data.get('customername', '')
-            po_number = order_data.get('po_number') or order_data.get('customerreference', '')
-            
-            result.append({
-                'id': str(order_result.id),
-                'order_key': order_result.order_key,
-                'customer_name': customer_name,
-                'po_number': po_number,
-                'sale_id': str(order_result.sale_id) if order_result.sale_id else None,
-                'sale_order_id': str(order_result.sale_order_id) if order_result.sale_order_id else None,
-                'retry_count': order_result.retry_count or 0,
-                'reviewed': order_result.reviewed if order_result.reviewed is not None else False,
-                'upload': {
-                    'id': str(upload.id) if upload else None,
-                    'filename': upload.filename if upload else None,
-                    'created_at': upload.created_at.isoformat() if upload and upload.created_at else None,
-                    'client_name': client_name
-                } if upload else None,
-                'order_data': order_data,
-                'matching_details': order_data.get('matching_details'),
-                'sale_payload': order_data.get('sale_payload'),
-                'sale_order_payload': order_data.get('sale_order_payload'),
-                'created_at': order_result.created_at.isoformat() if order_result.created_at else None,
-                'processed_at': order_result.processed_at.isoformat() if order_result.processed_at else None
-            })
+        result = [
+            _completed_order_to_dict(order_result, order_result.upload, order_data, include_order_data)
+            for order_result, order_data in completed_orders
+        ]
         
-        return jsonify({
+        response = {
             'completed_orders': result,
-            'total': total,
+            'next_cursor': next_cursor,
             'limit': limit,
             'offset': offset
-        }), 200
+        }
+        if with_total:
+            response['total'] = total
+        return jsonify(response), 200
     
     except Exception as e:
         logger.error(f"Error getting completed orders: {str(e)}", exc_info=True)
@@ -2146,19 +2104,16 @@ def get_upload_csv(upload_id):
     Get CSV content for an upload (for preview).
     """
     try:
-        upload = SalesOrderUpload.query.get(uuid.UUID(upload_id))
+        upload = SalesOrderUpload.query.options(undefer(SalesOrderUpload.csv_content)).get(uuid.UUID(upload_id))
         if not upload:
             return jsonify({'error': 'Upload not found'}), 404
         
         if not upload.csv_content:
             return jsonify({'error': 'CSV content not available'}), 404
         
-        import base64
-        csv_content = base64.b64decode(upload.csv_content)
-        
         from flask import Response
         return Response(
-            csv_content,
+            upload.csv_content,
             mimetype='text/csv',
             headers={
                 'Content-Disposition': f'attachment; filename="{upload.filename}"'
@@ -2170,12 +2125,95 @@ def get_upload_csv(upload_id):
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 
+def _encode_cursor(created_at: datetime, row_id) -> str:
+    """Encode a (created_at, id) keyset position as an opaque pagination cursor."""
+    return f"{created_at.isoformat()}|{row_id}"
+
+
+def _decode_cursor(cursor: str) -> Optional[Tuple[datetime, uuid.UUID]]:
+    """Decode a cursor from _encode_cursor, or return None if it is malformed."""
+    try:
+        created_at, row_id = cursor.split('|', 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (ValueError, AttributeError):
+        return None
+
+
+def _order_results_subquery(include_order_data: bool):
+    """
+    Correlated subquery that returns an upload's order results as a JSON array.
+    
+    Postgres builds the array (json_agg over json_build_object), so each upload
+    row arrives with its results already assembled instead of being fetched in a
+    second query and put together in Python. json (not jsonb) keeps the payloads'
+    key order as sent to Cin7. The payload fields are always
+    promoted out of order_data; the raw order_data blob itself, which repeats
+    them, is only included when include_order_data is set.
+    """
+    order_data = SalesOrderResult.order_data
+    fields = [
+        ('id', SalesOrderResult.id),
+        ('order_key', SalesOrderResult.order_key),
+        ('row_numbers', SalesOrderResult.row_numbers),
+        ('status', SalesOrderResult.status),
+        ('sale_id', SalesOrderResult.sale_id),
+        ('sale_order_id', SalesOrderResult.sale_order_id),
+        ('error_message', SalesOrderResult.error_message),
+        ('error_type', SalesOrderResult.error_type),
+        ('retry_count', func.coalesce(SalesOrderResult.retry_count, 0)),
+        ('last_retry_at', SalesOrderResult.last_retry_at),
+        ('resolved_at', SalesOrderResult.resolved_at),
+        ('resolved_by', SalesOrderResult.resolved_by),
+        ('matching_details', order_data['matching_details']),
+        ('attempted_send', order_data['attempted_send']),
+        ('sale_payload', order_data['sale_payload']),
+        ('sale_order_payload', order_data['sale_order_payload']),
+        ('what_is_needed', order_data['what_is_needed']),
+        ('created_at', SalesOrderResult.created_at),
+        ('processed_at', SalesOrderResult.processed_at)
+    ]
+    if include_order_data:
+        fields.append(('order_data', order_data))
+    
+    result_object = func.json_build_object(
+        *(arg for key, column in fields for arg in (literal_column(f"'{key}'"), column))
+    )
+    return (
+        select(func.json_agg(aggregate_order_by(result_object, SalesOrderResult.created_at.asc())))
+        .where(SalesOrderResult.upload_id == SalesOrderUpload.id)
+        .scalar_subquery()
+        .label('order_results')
+    )
+
+
+def _upload_to_dict(upload, order_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Queue view shape of a SalesOrderUpload row with its serialized order results."""
+    return {
+        'id': upload.id,
+        'filename': upload.filename,
+        'client_id': upload.client_id,
+        'client_name': upload.client_name,
+        'total_rows': upload.total_rows,
+        'successful_orders': upload.successful_orders,
+        'failed_orders': upload.failed_orders,
+        'status': upload.status,
+        'has_csv': bool(upload.has_csv),
+        'created_at': upload.created_at,
+        'completed_at': upload.completed_at,
+        'order_results': order_results
+    }
+
+
 @webhooks_bp.route('/queue', methods=['GET'])
 @jwt_required()
 def get_queue():
     """
     Get upload history with order-level results.
     Returns list of SalesOrderUpload records with their SalesOrderResult records.
+    
+    Paginated by keyset: pass the returned next_cursor as ?cursor= to get the
+    next page. The total count is only computed when ?with_total=1 is given.
+    The raw order_data of each result is omitted unless ?include=order_data.
     """
     try:
         # Get query parameters
@@ -2183,86 +2221,75 @@ def get_queue():
         status = request.args.get('status')
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
-        
-        # Build query
-        query = SalesOrderUpload.query
+        cursor = request.args.get('cursor')
+        with_total = request.args.get('with_total', '').lower() in ('1', 'true', 'yes')
+        include_order_data = 'order_data' in request.args.get('include', '').split(',')
+        
+        # Select only the columns the list needs - plain rows instead of ORM objects
+        upload_columns = [
+            SalesOrderUpload.id,
+            SalesOrderUpload.filename,
+            SalesOrderUpload.client_id,
+            Client.name.label('client_name'),
+            SalesOrderUpload.total_rows,
+            SalesOrderUpload.successful_orders,
+            SalesOrderUpload.failed_orders,
+            SalesOrderUpload.status,
+            # Indicate if CSV is available for preview without loading it
+            (func.coalesce(func.length(SalesOrderUpload.csv_content), 0) > 0).label('has_csv'),
+            SalesOrderUpload.created_at,
+            SalesOrderUpload.completed_at,
+            _order_results_subquery(include_order_data)
+        ]
+        stmt = select(*upload_columns).outerjoin(Client, Client.id == SalesOrderUpload.client_id)
         
         if client_id:
-            try:
-                client_uuid = uuid.UUID(client_id)
-                query = query.filter_by(client_id=client_uuid)
-            except ValueError:
+            # Validated with a regex and bound as a string - Postgres casts it to uuid
+            if not _UUID_RE.match(client_id):
                 return jsonify({'error': 'Invalid client_id format'}), 400
+            stmt = stmt.where(SalesOrderUpload.client_id == client_id)
         
         if status:
-            query = query.filter_by(status=status)
-        
-        # Order by created_at descending
-        query = query.order_by(SalesOrderUpload.created_at.desc())
-        
-        # Get total count
-        total = query.count()
-        
-        # Apply pagination
-        uploads = query.limit(limit).offset(offset).all()
-        
-        # Build response
-        result = []
-        for upload in uploads:
-            # Get order results
-            order_results = SalesOrderResult.query.filter_by(upload_id=upload.id).order_by(SalesOrderResult.created_at.asc()).all()
-            
-            # Get client name
-            client_name = None
-            if upload.client_id:
-                try:
-                    client = Client.query.get(upload.client_id)
-                    if client:
-                        client_name = client.name
-                except Exception:
-                    pass
-            
-            result.append({
-                'id': str(upload.id),
-                'filename': upload.filename,
-                'client_id': str(upload.client_id) if upload.client_id else None,
-                'client_name': client_name,
-                'total_rows': upload.total_rows,
-                'successful_orders': upload.successful_orders,
-                'failed_orders': upload.failed_orders,
-                'status': upload.status,
-                'has_csv': bool(upload.csv_content),  # Indicate if CSV is available for preview
-                'created_at': upload.created_at.isoformat() if upload.created_at else None,
-                'completed_at': upload.completed_at.isoformat() if upload.completed_at else None,
-                'order_results': [{
-                    'id': str(or_result.id),
-                    'order_key': or_result.order_key,
-                    'row_numbers': or_result.row_numbers,
-                    'status': or_result.status,
-                    'sale_id': str(or_result.sale_id) if or_result.sale_id else None,
-                    'sale_order_id': str(or_result.sale_order_id) if or_result.sale_order_id else None,
-                    'error_message': or_result.error_message,
-                    'error_type': or_result.error_type,
-                    'retry_count': or_result.retry_count or 0,
-                    'last_retry_at': or_result.last_retry_at.isoformat() if or_result.last_retry_at else None,
-                    'resolved_at': or_result.resolved_at.isoformat() if or_result.resolved_at else None,
-                    'resolved_by': str(or_result.resolved_by) if or_result.resolved_by else None,
-                    'order_data': or_result.order_data,
-                    'matching_details': or_result.order_data.get('matching_details') if or_result.order_data else None,
-                    'sale_payload': or_result.order_data.get('sale_payload') if or_result.order_data else None,
-                    'sale_order_payload': or_result.order_data.get('sale_order_payload') if or_result.order_data else None,
-                    'what_is_needed': or_result.order_data.get('what_is_needed') if or_result.order_data else None,
-                    'created_at': or_result.created_at.isoformat() if or_result.created_at else None,
-                    'processed_at': or_result.processed_at.isoformat() if or_result.processed_at else None
-                } for or_result in order_results]
-            })
-        
-        return jsonify({
-            'uploads': result,
-            'total': total,
+            stmt = stmt.where(SalesOrderUpload.status == status)
+        
+        if cursor:
+            decoded_cursor = _decode_cursor(cursor)
+            if not decoded_cursor:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            stmt = stmt.where(tuple_(SalesOrderUpload.created_at, SalesOrderUpload.id) < tuple_(*decoded_cursor))
+        
+        if with_total:
+            # Counted in the same SELECT (before LIMIT) instead of a separate COUNT(*)
+            stmt = stmt.add_columns(func.count().over().label('total_count'))
+        
+        # Newest first; id breaks ties so the keyset is unique
+        stmt = stmt.order_by(SalesOrderUpload.created_at.desc(), SalesOrderUpload.id.desc()).limit(limit)
+        if offset:
+            stmt = stmt.offset(offset)
+        uploads = db.session.execute(stmt).all()
+        
+        # Empty page (past the end, or nothing matches the filters) - skip the streaming response
+        if not uploads:
+            empty_page = {'uploads': [], 'next_cursor': None, 'limit': limit, 'offset': offset}
+            if with_total:
+                empty_page['total'] = 0
+            return orjson_response(empty_page)
+        
+        next_cursor = _encode_cursor(uploads[-1].created_at, uploads[-1].id) if len(uploads) == limit else None
+        
+        def serialize_uploads():
+            for upload in uploads:
+                yield _upload_to_dict(upload, upload.order_results or [])
+        
+        # Serialize upload by upload instead of building the full list and body in memory
+        extra = {
+            'next_cursor': next_cursor,
             'limit': limit,
             'offset': offset
-        }), 200
+        }
+        if with_total:
+            extra['total'] = uploads[0].total_count
+        return orjson_stream_response('uploads', serialize_uploads(), extra)
     
     except Exception as e:
         logger.error(f"Error getting queue: {str(e)}", exc_info=True)
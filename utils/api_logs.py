@@ -0,0 +1,57 @@
+"""Batched writes of Cin7 API call logs"""
+import logging
+import threading
+from typing import Any, Dict, List
+
+from database import db, Cin7ApiLog
+
+logger = logging.getLogger(__name__)
+
+
+class ApiLogBuffer:
+    """
+    Collects Cin7ApiLog rows and writes them with one INSERT/commit per batch.
+    
+    Used by the webhook and manual upload pipelines so a batch of orders doesn't
+    pay a commit for every API call. Call flush() once processing finishes. Safe
+    to share between threads - each flush writes through the calling thread's session.
+    """
+    
+    def __init__(self, batch_size: int = 50):
+        self.batch_size = batch_size
+        self.entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+    
+    def add(self, entry: Dict[str, Any]):
+        """Queue a log row (Cin7ApiLog column -> value) and flush when the batch is full."""
+        with self._lock:
+            self.entries.append(entry)
+            full = len(self.entries) >= self.batch_size
+        if full:
+            self.flush()
+    
+    def flush(self):
+        """Insert all queued rows."""
+        with self._lock:
+            if not self.entries:
+                return
+            batch, self.entries = self.entries, []
+        try:
+            db.session.bulk_insert_mappings(Cin7ApiLog, batch)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            error_str = str(e).lower()
+            if 'trigger' not in error_str and 'column' not in error_str:
+                logger.error(f"Error logging API calls: {str(e)}")
+                return
+            # Databases without the trigger column: retry without it
+            try:
+                db.session.bulk_insert_mappings(
+                    Cin7ApiLog,
+                    [{k: v for k, v in entry.items() if k != 'trigger'} for entry in batch]
+                )
+                db.session.commit()
+            except Exception as retry_error:
+                logger.error(f"Error logging API calls: {str(retry_error)}")
+                db.session.rollback()
@@ -0,0 +1,252 @@
+"""Cached lookups of client credentials, settings, column mappings and names"""
+import os
+import uuid
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from cachetools.func import ttl_cache
+from sqlalchemy import text
+
+from database import db, ClientCsvMapping, Client
+
+# How long credentials/settings for a connection are reused before re-reading the DB (seconds)
+SETTINGS_CACHE_TTL = int(os.environ.get('SETTINGS_CACHE_TTL', '300'))
+# Client names change rarely; short TTL keeps other gunicorn workers from serving stale names for long
+CLIENT_NAME_CACHE_TTL = int(os.environ.get('CLIENT_NAME_CACHE_TTL', '60'))
+# Scheduled reports repeat the same few subjects, so name -> credentials lookups are reused (seconds)
+CLIENT_LOOKUP_CACHE_TTL = int(os.environ.get('CLIENT_LOOKUP_CACHE_TTL', '300'))
+
+
+CUSTOMER_DEFAULT_COLUMNS = ('customer_account_receivable', 'customer_revenue_account', 'customer_tax_rule', 'customer_attribute_set')
+
+
+@lru_cache(maxsize=1)
+def customer_columns_present() -> frozenset:
+    """
+    Return which optional customer-default columns exist on voyager.client_erp_credentials.
+    
+    The answer only changes with a migration (and deploys restart the process),
+    so information_schema is probed once per process.
+    """
+    check_customer_cols_query = text("""
+        SELECT column_name 
+        FROM information_schema.columns 
+        WHERE table_schema = 'voyager' 
+        AND table_name = 'client_erp_credentials' 
+        AND column_name IN ('customer_account_receivable', 'customer_revenue_account', 'customer_tax_rule', 'customer_attribute_set')
+    """)
+    return frozenset(row[0] for row in db.session.execute(check_customer_cols_query).fetchall())
+
+
+@lru_cache(maxsize=1)
+def _settings_bundle_query():
+    """Build the credentials + settings SELECT once for the columns this database has."""
+    existing_customer_cols = customer_columns_present()
+    
+    select_fields = [
+        'cec.id',
+        'cec.client_id',
+        'cec.cin7_api_auth_accountid as account_id',
+        'cec.cin7_api_auth_applicationkey as application_key',
+        'cec.sale_type',
+        'cec.tax_rule',
+        'cec.default_status'
+    ]
+    for col in CUSTOMER_DEFAULT_COLUMNS:
+        if col in existing_customer_cols:
+            select_fields.append(f'cec.{col}')
+        else:
+            select_fields.append(f'NULL as {col}')
+    
+    return text(f"""
+        SELECT 
+            {', '.join(select_fields)},
+            cs.id as settings_id,
+            cs.default_status as settings_default_status,
+            cs.default_currency,
+            cs.tax_inclusive,
+            cs.default_location,
+            cs.default_delay_between_orders
+        FROM voyager.client_erp_credentials cec
+        LEFT JOIN cin7_uploader.client_settings cs ON cs.client_id = cec.client_id
+        WHERE cec.erp = 'cin7_core'
+        AND cec.id = :cred_id
+    """)
+
+
+@ttl_cache(maxsize=256, ttl=SETTINGS_CACHE_TTL)
+def load_settings_bundle(cred_id: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Load the Cin7 credentials and processing settings for a credential ID.
+    
+    Credentials, client_id and ClientSettings come back from a single query and
+    the result is cached for SETTINGS_CACHE_TTL seconds. Endpoints that change
+    credentials or settings call load_settings_bundle.cache_clear().
+    
+    Args:
+        cred_id: client_erp_credentials ID as a string
+        
+    Returns:
+        (creds, settings) tuple, or None if the credentials are missing/incomplete.
+        Callers must not mutate the returned dicts.
+    """
+    query = _settings_bundle_query()
+    cred_row = db.session.execute(query, {'cred_id': cred_id}).fetchone()
+    
+    if not cred_row or not cred_row.account_id or not cred_row.application_key:
+        return None
+    
+    creds = {
+        'id': cred_row.id,
+        'client_id': cred_row.client_id,
+        'account_id': cred_row.account_id,
+        'application_key': cred_row.application_key
+    }
+    
+    settings = {
+        'sale_type': cred_row.sale_type,
+        'tax_rule': cred_row.tax_rule,
+        'customer_account_receivable': cred_row.customer_account_receivable or None,
+        'customer_revenue_account': cred_row.customer_revenue_account or None,
+        'customer_tax_rule': str(cred_row.customer_tax_rule) if cred_row.customer_tax_rule else None,
+        'customer_attribute_set': cred_row.customer_attribute_set
+    }
+    if cred_row.settings_id:
+        settings.update({
+            'default_status': cred_row.default_status or cred_row.settings_default_status,
+            'default_currency': cred_row.default_currency,
+            'tax_inclusive': cred_row.tax_inclusive,
+            'default_location': cred_row.default_location,
+            'default_delay_between_orders': cred_row.default_delay_between_orders
+        })
+    else:
+        settings.update({
+            'default_status': cred_row.default_status or 'DRAFT',
+            'default_currency': 'USD',
+            'tax_inclusive': False,
+            'default_location': None,
+            'default_delay_between_orders': 0.7
+        })
+    
+    return creds, settings
+
+
+@ttl_cache(maxsize=256, ttl=SETTINGS_CACHE_TTL)
+def load_default_column_mapping(cred_id: str) -> Optional[Mapping[str, str]]:
+    """
+    Return a credential's default CSV column mapping, or None if it has none.
+    
+    Cached for SETTINGS_CACHE_TTL seconds like load_settings_bundle. Endpoints
+    that change mappings call load_default_column_mapping.cache_clear().
+    
+    Args:
+        cred_id: client_erp_credentials ID as a string
+        
+    Returns:
+        Read-only view of the mapping (Cin7 field -> CSV column), or None
+    """
+    default_mapping_obj = ClientCsvMapping.query.filter_by(
+        client_erp_credentials_id=uuid.UUID(cred_id),
+        is_default=True
+    ).first()
+    
+    if not default_mapping_obj:
+        return None
+    return MappingProxyType(dict(default_mapping_obj.column_mapping or {}))
+
+
+@ttl_cache(maxsize=1024, ttl=CLIENT_NAME_CACHE_TTL)
+def _cached_client_name(client_id: str) -> Optional[str]:
+    client = Client.query.get(uuid.UUID(client_id))
+    return client.name if client else None
+
+
+def get_client_name(client_id) -> Optional[str]:
+    """
+    Return a client's name, cached for CLIENT_NAME_CACHE_TTL seconds.
+    
+    Order listings show the same handful of clients on every row, so names are
+    served from memory instead of a Client lookup per row. Call
+    clear_client_name_cache() after renaming a client.
+    """
+    if not client_id:
+        return None
+    try:
+        return _cached_client_name(str(client_id))
+    except Exception:
+        return None
+
+
+def clear_client_name_cache():
+    """Drop cached client names (after a client is renamed)."""
+    _cached_client_name.cache_clear()
+
+
+def lookup_client_by_name(client_name: str) -> Optional[uuid.UUID]:
+    """
+    Lookup client by name in voyager.client or voyager.client_erp_credentials.
+    
+    Results (including misses) are cached per normalized name for
+    CLIENT_LOOKUP_CACHE_TTL seconds. Endpoints that change clients or
+    credentials call clear_client_lookup_cache().
+    
+    Args:
+        client_name: Client name to search for
+        
+    Returns:
+        client_erp_credentials_id (UUID) or None if not found
+    """
+    if not client_name:
+        return None
+    
+    client_name = client_name.strip().lower()
+    if not client_name:
+        return None
+    
+    return _lookup_client_by_name_cached(client_name)
+
+
+def clear_client_lookup_cache():
+    """Drop cached client name -> credentials lookups (after clients or credentials change)."""
+    _lookup_client_by_name_cached.cache_clear()
+
+
+@ttl_cache(maxsize=512, ttl=CLIENT_LOOKUP_CACHE_TTL)
+def _lookup_client_by_name_cached(client_name: str) -> Optional[uuid.UUID]:
+    # One round trip for both lookups: a voyager.client.name match (pri 1) wins
+    # over a client_erp_credentials.connection_name match (pri 2).
+    # Both predicates can be index-backed with expression indexes on the voyager side, e.g.
+    #   CREATE INDEX ON voyager.client (LOWER(TRIM(name)));
+    #   CREATE INDEX ON voyager.client_erp_credentials (LOWER(TRIM(connection_name))) WHERE erp = 'cin7_core';
+    query = text("""
+        (
+            SELECT cec.id AS credential_id, 1 AS pri
+            FROM voyager.client c
+            INNER JOIN voyager.client_erp_credentials cec ON cec.client_id = c.id
+            WHERE cec.erp = 'cin7_core'
+            AND LOWER(TRIM(c.name)) = LOWER(TRIM(:client_name))
+            AND cec.cin7_api_auth_accountid IS NOT NULL
+            AND cec.cin7_api_auth_applicationkey IS NOT NULL
+            LIMIT 1
+        )
+        UNION ALL
+        (
+            SELECT cec.id AS credential_id, 2 AS pri
+            FROM voyager.client_erp_credentials cec
+            WHERE cec.erp = 'cin7_core'
+            AND LOWER(TRIM(cec.connection_name)) = LOWER(TRIM(:client_name))
+            AND cec.cin7_api_auth_accountid IS NOT NULL
+            AND cec.cin7_api_auth_applicationkey IS NOT NULL
+            LIMIT 1
+        )
+        ORDER BY pri
+        LIMIT 1
+    """)
+    
+    row = db.session.execute(query, {'client_name': client_name}).fetchone()
+    
+    if row:
+        return row.credential_id
+    
+    return None